@@ -4,7 +4,7 @@ from sqlalchemy import insert, or_, select, update, and_, delete
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-import httpx
+from app.api.http_clients import clients
 from typing import List, Dict, Optional
 from collections import defaultdict
 from sqlalchemy import text
@@ -13,6 +13,7 @@ from datetime import datetime, date, time, timedelta
 from uuid import uuid4
 
 CAMERA_API_URL = "https://api.notis.vn/v4/cameras/bybbox?lat1=11.160767&lng1=106.554166&lat2=9.45&lng2=128.99999"
+clients.register("camera_api")
 
 class DBManager:
     def __init__(self, session: get_db):
@@ -645,12 +646,11 @@ async def get_traffic_tracking_by_date(
 
 
 async def fetch_cameras_from_api() -> List[Dict]:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(CAMERA_API_URL)
-        response.raise_for_status()
-        data = response.json()
-        rs = [{"camera_id": x["_id"], "loc": x["loc"]} for x in data]
-        return rs
+    response = await clients.get("camera_api").get(CAMERA_API_URL)
+    response.raise_for_status()
+    data = response.json()
+    rs = [{"camera_id": x["_id"], "loc": x["loc"]} for x in data]
+    return rs
     
 async def get_heatmap(
     db: Database,
@@ -1,6 +1,11 @@
+import hashlib
+import json
+import os
+import time
 from typing import List, Dict, Optional
-from fastapi import APIRouter, HTTPException, Depends
-from app.api.models import Camera, FollowRequest, FollowCamera, CreateCamera
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from app.api.models import Camera, FollowRequest, FollowCamera, CreateCamera, CameraROI
 from app.api import db_manager
 from app.api.db_manager import DBManager
 from sqlalchemy.orm import Session
@@ -9,8 +14,8 @@ from databases import Database
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, From, To, TemplateId, Substitution
 from sqlalchemy import select
-import httpx
-from fastapi.responses import StreamingResponse
+from app.api.http_clients import clients
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 cameras = APIRouter()
@@ -27,14 +32,67 @@ async def write_all_cameras_to_db(db=Depends(get_db)) -> str:
         raise HTTPException(status_code=500, detail=str(e))
     
 
+# How long an encoded camera list and its ETag are served before they are
+# rebuilt from the upstream API and database, 0 to rebuild on every request
+CAMERA_LIST_TTL_S = float(os.getenv("CAMERA_LIST_TTL_S", "10"))
+CAMERA_LIST_CACHE_SIZE = 64
+# (is_enabled, search) -> (expires at, ETag, encoded list)
+_camera_lists: Dict[tuple, tuple] = {}
+
+
+def _opaque_tag(tag: str) -> str:
+    """``tag`` without its weak ``W/`` prefix."""
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag``.
+
+    The header is ``*`` or a comma-separated list of entity tags. As
+    If-None-Match requires, tags are compared weakly (a ``W/`` prefix is ignored).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque_tag(tag.strip()) == _opaque_tag(etag) for tag in if_none_match.split(",") if tag.strip())
+
+
+async def encoded_camera_list(db: Database, is_enabled: Optional[bool], search: Optional[str]) -> tuple:
+    """The camera list as JSON bytes with its ETag, cached for ``CAMERA_LIST_TTL_S``."""
+    cache_key = (is_enabled, search)
+    cached = _camera_lists.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    cameras = jsonable_encoder(await db_manager.get_camera_list(db, is_enabled, search))
+    # lastModified is a placeholder default, not a change marker: hash everything else
+    content = [{key: value for key, value in camera.items() if key != 'lastModified'} for camera in cameras]
+    digest = hashlib.blake2b(json.dumps(content, sort_keys=True).encode(), digest_size=16).hexdigest()
+    etag = f'"{digest}"'
+    body = json.dumps(cameras, ensure_ascii=False, separators=(",", ":")).encode()
+    if CAMERA_LIST_TTL_S > 0:
+        if len(_camera_lists) >= CAMERA_LIST_CACHE_SIZE:
+            _camera_lists.clear()
+        _camera_lists[cache_key] = (time.monotonic() + CAMERA_LIST_TTL_S, etag, body)
+    return etag, body
+
+
 @cameras.get("/cameras")
 async def list_cameras(
+    request: Request,
     is_enabled: Optional[bool] = None,
     search: Optional[str] = None,
     db=Depends(get_db)
 ):
-    cameras = await db_manager.get_camera_list(db, is_enabled, search)
-    return cameras
+    """List cameras, with an ETag of the list
+
+    Clients that send the ETag of their copy back in If-None-Match get an
+    empty 304 response while the list is unchanged. The list and its ETag
+    are rebuilt at most every ``CAMERA_LIST_TTL_S`` seconds, so upstream
+    changes show up that much later; ROI changes show up right away.
+    """
+    etag, body = await encoded_camera_list(db, is_enabled, search)
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
 
 # @cameras.get("/demo-cameras", response_model=List[Camera])
 # async def list_demo_cameras(
@@ -85,6 +143,31 @@ async def read_camera(camera_id: str, db=Depends(get_db)):
         raise HTTPException(status_code=404, detail="Camera not found")
     return camera
 
+@cameras.get("/cameras/{camera_id}/roi")
+async def read_camera_roi(camera_id: str, db=Depends(get_db)):
+    polygon = await db_manager.get_camera_roi(db, camera_id)
+    if polygon is None:
+        raise HTTPException(status_code=404, detail="No ROI set for this camera")
+    return {"cameraId": camera_id, "polygon": polygon}
+
+@cameras.put("/cameras/{camera_id}/roi")
+async def set_camera_roi(camera_id: str, roi: CameraROI, db=Depends(get_db)):
+    camera = await db_manager.get_camera_by_id(db, camera_id)
+    if not camera:
+        raise HTTPException(status_code=404, detail="Camera not found")
+    result = await db_manager.upsert_camera_roi(db, camera_id, roi)
+    # Cached camera lists carry the old ROI
+    _camera_lists.clear()
+    return result
+
+@cameras.delete("/cameras/{camera_id}/roi")
+async def remove_camera_roi(camera_id: str, db=Depends(get_db)):
+    deleted = await db_manager.delete_camera_roi(db, camera_id)
+    _camera_lists.clear()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="No ROI set for this camera")
+    return {"message": "ROI deleted successfully"}
+
 @cameras.get("/cameras/detection/classes")
 async def get_vehicles():
     vehicles = ['bicycle', 'motorcycle', 'car', 'van', 'truck', 'bus', 'fire truck', 'container']
@@ -102,13 +185,17 @@ async def read_camera_image(camera_id: str, db=Depends(get_db)):
     camera = await db_manager.get_camera_by_id(db, camera_id)
     if not camera or not camera.liveviewUrl:
         raise HTTPException(status_code=404, detail="Camera not found or liveviewUrl missing")
-    async with httpx.AsyncClient() as client:   
-        response = await client.get(camera.liveviewUrl, headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True)
-        if response.status_code != 200:
-            raise HTTPException(status_code=502, detail="Failed to fetch image from camera")
-        content_type = response.headers.get("content-type", "image/jpeg")
-        return StreamingResponse(response.aiter_bytes(), media_type=content_type)
+    response = await clients.get("upstream").get(camera.liveviewUrl)
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail="Failed to fetch image from camera")
+    content_type = response.headers.get("content-type", "image/jpeg")
+    return StreamingResponse(response.aiter_bytes(), media_type=content_type)
     
+@cameras.get("/cameras/http/stats")
+async def get_http_stats():
+    """Requests, new connections and connection reuse per upstream client."""
+    return clients.stats()
+
 @cameras.get("/cameras/district/{district}")
 async def get_cameras_by_district(district: str, db=Depends(get_db)):
     cameras = await db_manager.get_cameras_by_district(db, district)
@@ -51,6 +51,16 @@ follow_camera = Table(
     Column('userEmail', String),
 )
 
+# Per-camera region of interest: polygon of [x, y] points normalised to the
+# frame size. Only vehicles inside it are counted by the detector.
+camera_roi = Table(
+    'camera_roi',
+    metadata,
+    Column('cameraId', String, primary_key=True),
+    Column('polygon', JSONB, nullable=False),
+    Column('lastModified', DateTime, default=datetime.utcnow)
+)
+
 database = Database(DATABASE_URI)
 
 
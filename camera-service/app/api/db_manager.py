@@ -1,11 +1,12 @@
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
-import httpx
-from app.api.db import cameras, get_db, follow_camera, demoCameras
-from app.api.models import CAMERA_API_URL, Camera, FollowRequest, FollowCamera, CreateCamera
+from app.api.db import cameras, get_db, follow_camera, demoCameras, camera_roi
+from app.api.http_clients import clients
+from app.api.models import CAMERA_API_URL, Camera, FollowRequest, FollowCamera, CreateCamera, CameraROI
 from databases import Database
 from pydantic import ValidationError
 from sqlalchemy import insert, or_, select, update, and_, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
@@ -16,6 +17,9 @@ import asyncio
 
 camera_status = {}
 
+# Camera list API and the city's image server, shared by all requests
+clients.register("upstream", headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True)
+
 def truncate_string(value: str, max_length: int = 50) -> str:
     if isinstance(value, str) and len(value) > max_length:
         return value[:max_length]
@@ -26,11 +30,10 @@ class DBManager:
         self.session = session
 
 async def fetch_cameras_from_api() -> List[Dict]:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(CAMERA_API_URL)
-        response.raise_for_status()
-        data = response.json()
-        return data
+    response = await clients.get("upstream").get(CAMERA_API_URL)
+    response.raise_for_status()
+    data = response.json()
+    return data
     
 async def get_all_cameras() -> List[Camera]:
     camera_list = []
@@ -213,6 +216,7 @@ async def get_camera_list(
     db_cameras = await db.fetch_all(stmt)
     
     camera_ids_from_db = {camera['_id'] for camera in db_cameras}
+    rois = await get_all_rois(db)
 
     for camera in api_data:
         if camera['_id'] in camera_ids_from_db:
@@ -220,6 +224,7 @@ async def get_camera_list(
             camera['liveviewUrl'] = f"http://giaothong.hochiminhcity.gov.vn/render/ImageHandler.ashx?id={camera['_id']}"
         else:
             camera['isEnabled'] = False
+        camera['roi'] = rois.get(camera['_id'])
 
     if is_enabled is not None:
         api_data = [camera for camera in api_data if camera['isEnabled'] == is_enabled]
@@ -232,6 +237,31 @@ async def get_camera_list(
             or search_pattern in camera['dist']]
     return [Camera(**camera) for camera in api_data]
 
+async def get_all_rois(db: Database) -> Dict[str, List[List[float]]]:
+    rows = await db.fetch_all(select(camera_roi))
+    return {row['cameraId']: row['polygon'] for row in rows}
+
+async def get_camera_roi(db: Database, camera_id: str) -> Optional[List[List[float]]]:
+    row = await db.fetch_one(select(camera_roi).where(camera_roi.c.cameraId == camera_id))
+    return row['polygon'] if row else None
+
+async def upsert_camera_roi(db: Database, camera_id: str, roi: CameraROI) -> dict:
+    values = {'cameraId': camera_id, 'polygon': roi.polygon, 'lastModified': datetime.utcnow()}
+    stmt = pg_insert(camera_roi).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[camera_roi.c.cameraId],
+        set_={'polygon': stmt.excluded.polygon, 'lastModified': stmt.excluded.lastModified},
+    )
+    await db.execute(stmt)
+    return values
+
+async def delete_camera_roi(db: Database, camera_id: str) -> bool:
+    row = await db.fetch_one(select(camera_roi).where(camera_roi.c.cameraId == camera_id))
+    if row is None:
+        return False
+    await db.execute(delete(camera_roi).where(camera_roi.c.cameraId == camera_id))
+    return True
+
 async def get_follow_camera(
     db: Database,
     user_id: str
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 CAMERA_API_URL = "https://api.notis.vn/v4/cameras/bybbox?lat1=11.160767&lng1=106.554166&lat2=9.45&lng2=128.99999"
 
@@ -23,6 +23,7 @@ class Camera(BaseModel):
     liveviewUrl: str
     isEnabled: bool
     lastModified: datetime = datetime.utcnow()
+    roi: Optional[List[List[float]]] = None
 
 class CreateCamera(BaseModel):
     id: str
@@ -55,4 +56,18 @@ class FollowCamera(BaseModel):
 class FollowRequest(BaseModel):
     cameraId: str
     userId: str
-    userEmail: str
\ No newline at end of file
+    userEmail: str
+
+
+class CameraROI(BaseModel):
+    polygon: List[List[float]]
+
+    @field_validator('polygon')
+    @classmethod
+    def check_polygon(cls, polygon: List[List[float]]) -> List[List[float]]:
+        if len(polygon) < 3:
+            raise ValueError("ROI polygon needs at least 3 points")
+        for point in polygon:
+            if len(point) != 2 or not all(0.0 <= v <= 1.0 for v in point):
+                raise ValueError("ROI points must be [x, y] pairs normalised to [0, 1]")
+        return polygon
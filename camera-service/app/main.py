@@ -3,6 +3,7 @@ from app.api.camera import cameras
 from app.api.db import metadata, database, engine
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.camera import send_email
+from app.api.http_clients import clients
 metadata.create_all(engine)
 import asyncio
 app = FastAPI(openapi_url="/api/v1/cameras/openapi.json", docs_url="/docs")
@@ -20,9 +21,11 @@ app.add_middleware(
 async def startup():
     print("starting up")
     await database.connect()
+    clients.start()
 
 @app.on_event("shutdown")
 async def shutdown():
+    await clients.close()
     await database.disconnect()
 
 
@@ -0,0 +1,101 @@
+# Copy of traffic-detection-monitoring/app/api/http_clients.py, the source
+# of truth. Each service is built from its own directory; change that file
+# and copy it over instead of editing this one.
+import os
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 with it installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+HTTP2 = os.getenv("HTTP2", "true").lower() == "true" and HTTP2_AVAILABLE
+
+
+class HTTPClients:
+    """Long-lived, pooled httpx clients, one per upstream service.
+
+    Connections are kept alive between calls instead of paying a TCP (and
+    TLS) handshake per request. Clients are created in the startup hook
+    (``start``) and closed on shutdown (``close``); ``get`` creates one on
+    first use outside the app (scripts, tests). Every request is traced so
+    ``stats`` can tell requests from newly opened connections.
+    """
+
+    def __init__(self):
+        self._config: Dict[str, Dict] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def register(self, name: str, base_url: str = "", timeout: float = HTTP_TIMEOUT_S, **kwargs):
+        """Declare a client; ``kwargs`` go to httpx.AsyncClient (e.g. default headers)."""
+        self._config[name] = dict(base_url=base_url, timeout=timeout, **kwargs)
+        self._stats[name] = {"requests": 0, "connections": 0, "tls_handshakes": 0, "http2_requests": 0}
+
+    def start(self):
+        for name in self._config:
+            self.get(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create(name)
+        return client
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        config = dict(self._config[name])
+        timeout = config.pop("timeout")
+        stats = self._stats[name]
+
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats["connections"] += 1
+            elif event_name == "connection.start_tls.complete":
+                stats["tls_handshakes"] += 1
+            elif event_name.endswith(".send_request_headers.started"):
+                stats["requests"] += 1
+                if event_name.startswith("http2."):
+                    stats["http2_requests"] += 1
+
+        async def add_trace(request: httpx.Request):
+            request.extensions["trace"] = trace
+
+        return httpx.AsyncClient(
+            http2=HTTP2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+            ),
+            timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT_S),
+            event_hooks={"request": [add_trace]},
+            **config,
+        )
+
+    def stats(self) -> Dict:
+        snapshot = {}
+        for name, stats in self._stats.items():
+            requests = stats["requests"]
+            snapshot[name] = {
+                **stats,
+                "reused": max(0, requests - stats["connections"]),
+                "reuse_rate": max(0, requests - stats["connections"]) / requests if requests else 0.0,
+                "http2": HTTP2,
+            }
+        return snapshot
+
+
+clients = HTTPClients()
@@ -4,7 +4,7 @@ from app.api.models import DetectionTime, DetectionDate, DetectionResultsByDate,
 from app.api import db_manager
 from app.api.database import get_db
 from databases import Database
-import httpx
+from app.api.http_clients import clients
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -16,6 +16,12 @@ statistic = APIRouter()
 
 # CAMERA_SERVICE_URL = "http://localhost:8002"
 CAMERA_SERVICE_URL = "http://nginx:8080"
+clients.register("camera", base_url=CAMERA_SERVICE_URL)
+
+@statistic.get("/http/stats")
+async def get_http_stats():
+    """Requests, new connections and connection reuse per upstream client."""
+    return clients.stats()
 
 @statistic.get("/timestamp", response_model=List[DetectionTime])
 async def get_timestamp(db: Database = Depends(get_db)) -> List[DetectionTime]:
@@ -67,11 +73,10 @@ async def get_custom_detection_results_by_district(
     return result
 
 async def get_cameras_by_district(district: str) -> List[Dict]:
-    async with httpx.AsyncClient(base_url=CAMERA_SERVICE_URL) as client:
-        response = await client.get(f"/cameras/district/{district}")
-        response.raise_for_status()
-        cameras = response.json()
-        return cameras
+    response = await clients.get("camera").get(f"/cameras/district/{district}")
+    response.raise_for_status()
+    cameras = response.json()
+    return cameras
     
 @statistic.get("/custom_detection_results_by_camera", response_model=DetectionResultsByCamera)
 async def get_custom_detection_results_by_camera(
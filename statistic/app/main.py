@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.database import metadata, database, engine
 from app.api.statistic import statistic
+from app.api.http_clients import clients
 import asyncio
 from app.api.database import engine, Base
 import time
@@ -24,9 +25,11 @@ Base.metadata.create_all(bind=engine)
 async def start_scheduler():
     load_dotenv()
     await database.connect()
+    clients.start()
     
 @app.on_event("shutdown")
 async def shutdown():
+    await clients.close()
     await database.disconnect()
     
 app.include_router(statistic, tags=['statistic'])
\ No newline at end of file
@@ -0,0 +1,88 @@
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.api.config import BREAKER_BACKOFF_S, BREAKER_FAILURES, BREAKER_MAX_BACKOFF_S
+
+
+class Circuit:
+    """Failure state of one camera; cameras that never failed have none."""
+
+    __slots__ = ("failures", "trips", "open_until", "last_error", "since")
+
+    def __init__(self, now: float):
+        self.failures = 0  # consecutive
+        self.trips = 0  # times opened since the last success
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+        self.since = now
+
+
+class CircuitBreakers:
+    """Per-camera circuit breakers for snapshot downloads.
+
+    After ``failures`` consecutive failures a camera's circuit opens: it
+    is left out of sweeps for ``backoff_s``. Once that has passed, one
+    snapshot is tried (half-open). If it fails the circuit opens again for
+    twice as long, up to ``max_backoff_s``, with ±10% jitter so cameras
+    on the same dead host don't all retry together. Any success closes
+    the circuit and forgets the failures.
+    """
+
+    def __init__(self, failures: int, backoff_s: float, max_backoff_s: float):
+        self.failures = max(1, failures)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._circuits: Dict[str, Circuit] = {}
+        self.skipped = 0
+
+    def allow(self, camera_id: str, now: Optional[float] = None) -> bool:
+        circuit = self._circuits.get(camera_id)
+        if circuit is None or circuit.open_until <= (now or time.time()):
+            return True
+        self.skipped += 1
+        return False
+
+    def success(self, camera_id: str):
+        self._circuits.pop(camera_id, None)
+
+    def failure(self, camera_id: str, error: Exception, now: Optional[float] = None):
+        now = now or time.time()
+        circuit = self._circuits.get(camera_id)
+        if circuit is None:
+            circuit = self._circuits[camera_id] = Circuit(now)
+        circuit.failures += 1
+        circuit.last_error = repr(error)
+        # A failed half-open trial reopens at once; otherwise wait for enough failures in a row
+        if circuit.trips or circuit.failures >= self.failures:
+            backoff = min(self.max_backoff_s, self.backoff_s * 2 ** circuit.trips)
+            circuit.open_until = now + backoff * random.uniform(0.9, 1.1)
+            circuit.trips += 1
+
+    def open_circuits(self, now: Optional[float] = None) -> List[Dict]:
+        """Cameras currently skipped, longest failing first."""
+        now = now or time.time()
+        opened = [(cid, c) for cid, c in self._circuits.items() if c.open_until > now]
+        opened.sort(key=lambda item: item[1].since)
+        return [
+            {
+                "camera": cid,
+                "failures": c.failures,
+                "trips": c.trips,
+                "failing_since": c.since,
+                "retry_in_s": c.open_until - now,
+                "last_error": c.last_error,
+            }
+            for cid, c in opened
+        ]
+
+    def stats(self) -> Dict:
+        now = time.time()
+        return {
+            "failing": len(self._circuits),
+            "open": sum(c.open_until > now for c in self._circuits.values()),
+            "skipped": self.skipped,
+        }
+
+
+breakers = CircuitBreakers(BREAKER_FAILURES, BREAKER_BACKOFF_S, BREAKER_MAX_BACKOFF_S)
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from app.api.config import CATALOG_REFRESH_S
+from app.api.http_clients import clients
+
+
+class CameraCatalog:
+    """In-memory copy of camera-service's camera list.
+
+    Sweeps read the cached list instead of asking camera-service (and, in
+    turn, the external camera API and its database) every time. A
+    background task refreshes it every ``refresh_s`` with a conditional
+    request. While the list is unchanged camera-service answers
+    ``304 Not Modified`` with no body. A failed refresh keeps the last good
+    list. Only the first read waits for camera-service.
+    """
+
+    def __init__(self, refresh_s: float, client: str = "camera"):
+        self.refresh_s = refresh_s
+        self.client = client
+        self._cameras: Optional[List[dict]] = None
+        self._etag: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.not_modified = 0
+        self.changes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def get(self) -> List[dict]:
+        """The current camera list; fetched on the first call."""
+        if self._cameras is None:
+            await self.refresh()
+            if self._cameras is None:
+                raise RuntimeError(f"Camera list unavailable: {self.last_error}")
+        return self._cameras
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_s)
+
+    async def refresh(self):
+        async with self._lock:
+            headers = {"If-None-Match": self._etag} if self._etag and self._cameras is not None else {}
+            try:
+                response = await clients.get(self.client).get("/cameras", headers=headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = repr(e)
+                print(f"Error refreshing the camera list, keeping the cached one: {e!r}")
+                return
+            self.refreshes += 1
+            self.refreshed_at = time.time()
+            if response.status_code == 304:
+                self.not_modified += 1
+                return
+            self._cameras = response.json()
+            self._etag = response.headers.get("etag")
+            self.changes += 1
+            print(f"Camera list updated: {len(self._cameras)} cameras")
+
+    def stats(self) -> Dict:
+        return {
+            "cameras": len(self._cameras) if self._cameras is not None else None,
+            "etag": self._etag,
+            "age_s": time.time() - self.refreshed_at if self.refreshed_at else None,
+            "refreshes": self.refreshes,
+            "not_modified": self.not_modified,
+            "changes": self.changes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+camera_catalog = CameraCatalog(CATALOG_REFRESH_S)
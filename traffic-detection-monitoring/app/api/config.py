@@ -0,0 +1,77 @@
+import os
+import socket
+
+CAMERA_SERVICE_URL = os.getenv("CAMERA_SERVICE_URL", "http://localhost:8002")
+DETECTION_SERVICE_URL = os.getenv("DETECTION_SERVICE_URL", "http://localhost:8003")
+# Detection can take a while under load (batching, sliced inference)
+DETECTION_TIMEOUT_S = float(os.getenv("DETECTION_TIMEOUT_S", "30"))
+
+# Count each tracked vehicle once instead of every vehicle in every snapshot.
+# Tracking matches boxes between consecutive polls, so it only helps when
+# cameras are polled every few seconds; at minutes apart it counts like snapshots.
+TRACK_VEHICLES = os.getenv("TRACK_VEHICLES", "false").lower() == "true"
+
+# Sweep pipeline: concurrent workers per stage, and the size of the queues
+# between stages (a full queue makes the stage before it wait)
+PIPELINE_FETCHERS = int(os.getenv("PIPELINE_FETCHERS", "16"))
+PIPELINE_DETECTORS = int(os.getenv("PIPELINE_DETECTORS", "8"))
+PIPELINE_WRITERS = int(os.getenv("PIPELINE_WRITERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+# Number of recent sweeps kept for GET /pipeline/stats
+PIPELINE_HISTORY = int(os.getenv("PIPELINE_HISTORY", "20"))
+
+# Write-behind for detection results: rows are spooled to local disk and
+# inserted in bulk once WRITER_BATCH_ROWS are waiting, or at least every
+# WRITER_FLUSH_INTERVAL_S (also the retry interval while the database is down)
+WRITER_BATCH_ROWS = int(os.getenv("WRITER_BATCH_ROWS", "500"))
+WRITER_FLUSH_INTERVAL_S = float(os.getenv("WRITER_FLUSH_INTERVAL_S", "5"))
+SPOOL_PATH = os.getenv("SPOOL_PATH", "spool/results.db")
+# Oldest spooled rows are dropped beyond this
+SPOOL_MAX_MB = float(os.getenv("SPOOL_MAX_MB", "256"))
+
+# Sweeps start on wall-clock slots: every SWEEP_INTERVAL_S seconds, shifted
+# by SWEEP_OFFSET_S (interval 300, offset 0 -> :00, :05, :10, ...)
+SWEEP_INTERVAL_S = float(os.getenv("SWEEP_INTERVAL_S", "300"))
+SWEEP_OFFSET_S = float(os.getenv("SWEEP_OFFSET_S", "0"))
+# A slot is late when its sweep can't start within SWEEP_MAX_LAG_S of it
+# (the previous sweep overran, or the service just started). "skip" waits
+# for the next slot; "compress" runs the latest missed slot right away.
+SWEEP_MAX_LAG_S = float(os.getenv("SWEEP_MAX_LAG_S", "30"))
+SWEEP_LATE_POLICY = os.getenv("SWEEP_LATE_POLICY", "skip")
+
+# Adaptive polling: spend at most POLL_FPS_BUDGET snapshots per second
+# (averaged over a slot) and give cameras whose counts vary most the
+# largest share. Every camera is still polled at least once every
+# POLL_MAX_SKIP_SLOTS slots. 0 polls every camera in every slot.
+POLL_FPS_BUDGET = float(os.getenv("POLL_FPS_BUDGET", "0"))
+POLL_MAX_SKIP_SLOTS = int(os.getenv("POLL_MAX_SKIP_SLOTS", "12"))
+# Weight of the newest count in each camera's moving mean/variance
+POLL_EWMA_ALPHA = float(os.getenv("POLL_EWMA_ALPHA", "0.2"))
+
+# Camera snapshots: connect/read timeouts, and a cap on the whole download
+IMAGE_CONNECT_TIMEOUT_S = float(os.getenv("IMAGE_CONNECT_TIMEOUT_S", "3"))
+IMAGE_READ_TIMEOUT_S = float(os.getenv("IMAGE_READ_TIMEOUT_S", "5"))
+IMAGE_TIMEOUT_S = float(os.getenv("IMAGE_TIMEOUT_S", "10"))
+# After BREAKER_FAILURES consecutive failed snapshots a camera is skipped
+# for BREAKER_BACKOFF_S, doubling on every further failure up to BREAKER_MAX_BACKOFF_S
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_BACKOFF_S = float(os.getenv("BREAKER_BACKOFF_S", "60"))
+BREAKER_MAX_BACKOFF_S = float(os.getenv("BREAKER_MAX_BACKOFF_S", "3600"))
+# Work still unfinished this long after a sweep started is abandoned (0: no limit)
+SWEEP_DEADLINE_S = float(os.getenv("SWEEP_DEADLINE_S", str(SWEEP_INTERVAL_S * 0.9)))
+
+# The camera list is cached and refreshed in the background this often;
+# unchanged lists cost a 304 from camera-service
+CATALOG_REFRESH_S = float(os.getenv("CATALOG_REFRESH_S", "600"))
+
+# Sharding: replicas that hold a live lease split the cameras between them
+# by consistent hashing on the camera id. Leases live in Postgres
+# ("postgres") or, for replicas on one host, in SHARD_LEASE_DIR ("file").
+SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "false").lower() == "true"
+REPLICA_ID = os.getenv("REPLICA_ID", f"{socket.gethostname()}-{os.getpid()}")
+SHARD_LEASE_BACKEND = os.getenv("SHARD_LEASE_BACKEND", "postgres")
+SHARD_LEASE_DIR = os.getenv("SHARD_LEASE_DIR", "leases")
+# A replica that hasn't renewed its lease for this long is considered gone
+SHARD_LEASE_TTL_S = float(os.getenv("SHARD_LEASE_TTL_S", "30"))
+# Points per replica on the hash ring; more points, more even shares
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
@@ -30,6 +30,14 @@ detection_results = Table(
     Column('numberOfContainer', Integer, default=0),
 )
 
+# One row per running monitor replica, renewed while it is alive (see sharding.py)
+monitor_leases = Table(
+    'monitor_leases',
+    metadata,
+    Column('replicaId', String, primary_key=True),
+    Column('expiresAt', DateTime(timezone=True), nullable=False),
+)
+
 database = Database(DATABASE_URL)
 
 # Khởi tạo engine và sessionmaker
@@ -2,6 +2,12 @@ from app.api.database import get_db, detection_results
 from app.api.models import DetectionResults
 from databases import Database
 from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List
+
+# Postgres's limit on bind parameters in one statement
+MAX_BIND_PARAMS = 32767
+
 
 class DBManager:
     def __init__(self, session: get_db):
@@ -15,4 +21,20 @@ async def write_detection_result_to_db(db: Database, rs: DetectionResults) -> st
     except Exception as e:
         # Log or handle the exception as needed
         print(f"Error writing to database: {e}")
-        return f"Error: {e}"
\ No newline at end of file
+        return f"Error: {e}"
+
+async def write_detection_results_bulk(db: Database, rows: List[dict]):
+    """Insert many detection results with multi-row INSERTs in one transaction.
+
+    Rows are split into statements that stay under Postgres's bind
+    parameter limit. Rows whose detectionId is already stored are skipped,
+    so replaying a batch is harmless. Unlike write_detection_result_to_db,
+    errors are raised so the caller can keep the rows and retry.
+    """
+    if not rows:
+        return
+    chunk = max(1, MAX_BIND_PARAMS // len(detection_results.columns))
+    async with db.transaction():
+        for start in range(0, len(rows), chunk):
+            stmt = pg_insert(detection_results).values(rows[start:start + chunk])
+            await db.execute(stmt.on_conflict_do_nothing(index_elements=['detectionId']))
@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+
+from app.api.breaker import breakers
+from app.api.catalog import camera_catalog
+from app.api.http_clients import clients
+from app.api.pipeline import pipeline_stats
+from app.api.sharding import sharding
+from app.api.polling import poll_planner
+from app.api.scheduler import scheduler
+from app.api.writer import result_writer
+
+monitor = APIRouter()
+
+
+@monitor.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Sweep times, per-stage counts, errors and latencies of recent sweeps."""
+    return pipeline_stats.snapshot()
+
+
+@monitor.get("/http/stats")
+async def get_http_stats():
+    """Requests, new connections and connection reuse per upstream client."""
+    return clients.stats()
+
+
+@monitor.get("/writer/stats")
+async def get_writer_stats():
+    """Spooled rows, bulk flushes and failures of the result writer."""
+    return result_writer.stats()
+
+
+@monitor.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Slot lag, overruns and skipped slots of the sweep scheduler."""
+    return scheduler.stats()
+
+
+@monitor.get("/polling/stats")
+async def get_polling_stats():
+    """Snapshot budget, last slot's plan and the cameras whose counts vary most."""
+    return poll_planner.stats()
+
+
+@monitor.get("/circuits")
+async def get_open_circuits():
+    """Cameras currently skipped because their snapshots keep failing."""
+    return {**breakers.stats(), "cameras": breakers.open_circuits()}
+
+
+@monitor.get("/catalog/stats")
+async def get_catalog_stats():
+    """Size, age and refresh counters of the cached camera list."""
+    return camera_catalog.stats()
+
+
+@monitor.get("/shards")
+async def get_shards():
+    """Live replicas and the share of the cameras this replica polls."""
+    return sharding.stats()
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.api.config import (PIPELINE_DETECTORS, PIPELINE_FETCHERS, PIPELINE_HISTORY, PIPELINE_QUEUE_SIZE,
+                            PIPELINE_WRITERS, SWEEP_DEADLINE_S)
+
+STAGES = ("fetch", "detect", "write")
+_DONE = object()  # end-of-sweep marker, one per worker
+
+
+class SweepReport:
+    """Progress and timings of one sweep over the camera list."""
+
+    def __init__(self, cameras: int):
+        self.cameras = cameras
+        self.started_at = time.time()
+        self.duration_s: Optional[float] = None
+        self.done = {stage: 0 for stage in STAGES}
+        self.errors = {stage: 0 for stage in STAGES}
+        self.busy_s = {stage: 0.0 for stage in STAGES}  # summed over the stage's workers
+        self.abandoned = 0  # cameras still in flight when the deadline passed
+
+    def snapshot(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "cameras": self.cameras,
+            "done": self.done,
+            "errors": self.errors,
+            "abandoned": self.abandoned,
+            "mean_latency_s": {
+                stage: self.busy_s[stage] / (self.done[stage] + self.errors[stage])
+                if self.done[stage] + self.errors[stage] else None
+                for stage in STAGES
+            },
+        }
+
+
+class PipelineStats:
+    def __init__(self, history: int):
+        self.sweeps = 0
+        self.recent: deque = deque(maxlen=history)
+        self.current: Optional[SweepReport] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "sweeps": self.sweeps,
+            "current": self.current.snapshot() if self.current else None,
+            "recent": [report.snapshot() for report in self.recent],
+        }
+
+
+pipeline_stats = PipelineStats(PIPELINE_HISTORY)
+
+
+async def _worker(stage: str, report: SweepReport, source: asyncio.Queue,
+                  work: Callable[[dict, object], Awaitable], sink: Optional[asyncio.Queue]):
+    while True:
+        item = await source.get()
+        if item is _DONE:
+            return
+        camera, payload = item
+        started = time.perf_counter()
+        try:
+            result = await work(camera, payload)
+        except Exception as e:
+            report.errors[stage] += 1
+            print(f"{stage} failed for camera {camera.get('_id')}: {e!r}")
+            continue
+        finally:
+            report.busy_s[stage] += time.perf_counter() - started
+        report.done[stage] += 1
+        if sink is not None:
+            await sink.put((camera, result))
+
+
+async def run_sweep(
+    cameras: List[dict],
+    fetch: Callable[[dict], Awaitable],
+    detect: Callable[[dict, object], Awaitable],
+    write: Callable[[dict, object], Awaitable],
+    fetchers: int = PIPELINE_FETCHERS,
+    detectors: int = PIPELINE_DETECTORS,
+    writers: int = PIPELINE_WRITERS,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    deadline_s: Optional[float] = SWEEP_DEADLINE_S,
+) -> SweepReport:
+    """Fetch, detect and write every camera once, with the stages running concurrently.
+
+    Each stage is a pool of workers; bounded queues between them keep fast
+    stages from running ahead of slow ones (a slow detection service
+    throttles fetching instead of piling up images in memory). A camera
+    that fails in one stage is counted in the report and dropped, and
+    does not hold up the others. Cameras not finished ``deadline_s`` after
+    the start are abandoned, so a sweep can't run into the next one.
+
+    Args:
+        cameras (List[dict]): Cameras to sweep
+        fetch: ``fetch(camera) -> image``
+        detect: ``detect(camera, image) -> detection results``
+        write: ``write(camera, detection results)``
+        deadline_s (Optional[float]): Time limit of the sweep, None or 0 for no limit
+
+    Returns:
+        SweepReport: Counts, errors and timings of the sweep
+    """
+    report = SweepReport(len(cameras))
+    pipeline_stats.current = report
+    pending: asyncio.Queue = asyncio.Queue()
+    for camera in cameras:
+        pending.put_nowait((camera, None))
+    for _ in range(fetchers):
+        pending.put_nowait(_DONE)
+    images: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    results: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    fetching = asyncio.gather(*[
+        _worker("fetch", report, pending, lambda camera, _: fetch(camera), images) for _ in range(fetchers)
+    ])
+    detecting = asyncio.gather(*[_worker("detect", report, images, detect, results) for _ in range(detectors)])
+    writing = asyncio.gather(*[_worker("write", report, results, write, None) for _ in range(writers)])
+
+    async def drain():
+        await fetching
+        for _ in range(detectors):
+            await images.put(_DONE)
+        await detecting
+        for _ in range(writers):
+            await results.put(_DONE)
+        await writing
+
+    try:
+        await asyncio.wait_for(drain(), deadline_s or None)
+    except asyncio.TimeoutError:
+        report.abandoned = report.cameras - report.done["write"] - sum(report.errors.values())
+        print(f"Sweep deadline of {deadline_s}s passed, abandoned {report.abandoned} cameras")
+    finally:
+        for stage in (fetching, detecting, writing):
+            stage.cancel()
+        await asyncio.gather(fetching, detecting, writing, return_exceptions=True)
+        report.duration_s = time.time() - report.started_at
+        pipeline_stats.current = None
+        pipeline_stats.sweeps += 1
+        pipeline_stats.recent.append(report)
+    return report
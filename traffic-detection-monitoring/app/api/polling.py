@@ -0,0 +1,149 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.api.config import POLL_EWMA_ALPHA, POLL_FPS_BUDGET, POLL_MAX_SKIP_SLOTS, SWEEP_INTERVAL_S
+
+
+class CameraActivity:
+    """Moving mean and variance of a camera's vehicle counts, per hour of day."""
+
+    __slots__ = ("mean", "var", "samples", "credit", "last_polled")
+
+    def __init__(self):
+        self.mean = [0.0] * 24
+        self.var = [0.0] * 24
+        self.samples = [0] * 24
+        self.credit = 1.0  # new cameras are polled in the next slot
+        self.last_polled: Optional[datetime] = None
+
+    def observe(self, total: int, hour: int, alpha: float):
+        if self.samples[hour] == 0:
+            self.mean[hour] = float(total)
+        else:
+            # Exponentially weighted mean and variance
+            delta = total - self.mean[hour]
+            self.mean[hour] += alpha * delta
+            self.var[hour] = (1 - alpha) * (self.var[hour] + alpha * delta * delta)
+        self.samples[hour] += 1
+
+    def spread(self, hour: int) -> Optional[float]:
+        """Standard deviation of the counts at this hour, or over all hours if it has no samples yet."""
+        if self.samples[hour] > 1:
+            return math.sqrt(self.var[hour])
+        seen = [h for h in range(24) if self.samples[h] > 1]
+        if not seen:
+            return None
+        return math.sqrt(sum(self.var[h] for h in seen) / len(seen))
+
+
+class PollPlanner:
+    """Chooses which cameras to poll in each slot within a frame budget.
+
+    Each camera's share of the ``budget`` (snapshots per slot) is
+    proportional to how much its counts vary at the current hour of day,
+    so busy intersections are polled more often than quiet side streets.
+    Each camera gets at most one snapshot per slot, and at least one every
+    ``max_skip_slots`` slots. Shares are turned into polls by adding them
+    up per camera and polling a camera whenever it has collected a whole
+    snapshot, which spreads a camera's polls evenly over the slots.
+    Cameras without history are polled right away so they get one.
+    """
+
+    def __init__(self, fps_budget: float, interval_s: float, max_skip_slots: int, alpha: float):
+        self.budget = fps_budget * interval_s
+        self.min_rate = 1 / max(1, max_skip_slots)
+        self.alpha = alpha
+        self.cameras: Dict[str, CameraActivity] = {}
+        self.last_plan: Dict = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def rates(self, camera_ids: List[str], hour: int) -> Dict[str, float]:
+        """Expected snapshots per slot of each camera; they sum to the budget (or 1 each)."""
+        if len(camera_ids) <= self.budget:
+            return {cid: 1.0 for cid in camera_ids}
+        spreads = {cid: self.cameras[cid].spread(hour) if cid in self.cameras else None for cid in camera_ids}
+        known = [s for s in spreads.values() if s is not None]
+        # Cameras without history weigh as much as the busiest known one
+        default = max(known) if known else 1.0
+        # A small floor keeps all-zero cameras from collapsing the split
+        weights = {cid: (default if s is None else s) + 0.1 for cid, s in spreads.items()}
+        floor = min(self.min_rate, self.budget / len(camera_ids))
+        rates = {cid: floor for cid in camera_ids}
+        remaining = self.budget - floor * len(camera_ids)
+        # Hand out the rest by weight, capping at one snapshot per slot
+        open_ids = set(camera_ids)
+        while remaining > 1e-9 and open_ids:
+            total_weight = sum(weights[cid] for cid in open_ids)
+            overflow = 0.0
+            for cid in list(open_ids):
+                rates[cid] += remaining * weights[cid] / total_weight
+                if rates[cid] >= 1.0:
+                    overflow += rates[cid] - 1.0
+                    rates[cid] = 1.0
+                    open_ids.discard(cid)
+            remaining = overflow
+        return rates
+
+    def plan(self, cameras: List[dict], slot: datetime, catalog: Optional[List[dict]] = None) -> List[dict]:
+        """The cameras to poll in this slot.
+
+        Args:
+            cameras (List[dict]): Cameras that can be polled now
+            slot (datetime): Start of the slot
+            catalog (Optional[List[dict]]): Every camera this replica is
+                responsible for, including ones sitting out for now (e.g. an
+                open circuit). History is kept for these and dropped for the
+                rest. Defaults to ``cameras``.
+
+        Returns:
+            List[dict]: The cameras to poll
+        """
+        if not self.enabled:
+            self.last_plan = {"slot": slot.isoformat(), "cameras": len(cameras), "polled": len(cameras)}
+            return cameras
+        current = {camera['_id'] for camera in (cameras if catalog is None else catalog)}
+        for cid in [cid for cid in self.cameras if cid not in current]:
+            del self.cameras[cid]  # no longer in the catalog
+        rates = self.rates([camera['_id'] for camera in cameras], slot.hour)
+        due = []
+        for camera in cameras:
+            activity = self.cameras.setdefault(camera['_id'], CameraActivity())
+            activity.credit += rates[camera['_id']]
+            if activity.credit >= 1.0:
+                due.append(camera)
+        # Rounding can leave a few more cameras due than the budget allows: most credit first
+        due.sort(key=lambda camera: self.cameras[camera['_id']].credit, reverse=True)
+        due = due[:max(1, math.ceil(self.budget))]
+        for camera in due:
+            self.cameras[camera['_id']].credit -= 1.0
+        self.last_plan = {"slot": slot.isoformat(), "cameras": len(cameras), "polled": len(due),
+                          "budget": self.budget}
+        return due
+
+    def observe(self, camera_id: str, detection_results: dict, sampled_at: datetime):
+        """Record the counts of a camera's snapshot."""
+        total = sum(value for key, value in detection_results.items()
+                    if key.startswith("numberOf") and isinstance(value, int))
+        activity = self.cameras.setdefault(camera_id, CameraActivity())
+        activity.observe(total, sampled_at.hour, self.alpha)
+        activity.last_polled = sampled_at
+
+    def stats(self, top: int = 10) -> Dict:
+        hour = datetime.now().hour
+        spreads = sorted(((spread, cid) for spread, cid in
+                          ((activity.spread(hour), cid) for cid, activity in self.cameras.items())
+                          if spread is not None), reverse=True)
+        return {
+            "enabled": self.enabled,
+            "budget_per_slot": self.budget,
+            "cameras": len(self.cameras),
+            "last_plan": self.last_plan,
+            "most_variable": [{"camera": cid, "std": spread} for spread, cid in spreads[:top]],
+        }
+
+
+poll_planner = PollPlanner(POLL_FPS_BUDGET, SWEEP_INTERVAL_S, POLL_MAX_SKIP_SLOTS, POLL_EWMA_ALPHA)
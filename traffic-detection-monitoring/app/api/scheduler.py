@@ -0,0 +1,106 @@
+import asyncio
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.api.config import (PIPELINE_HISTORY, SWEEP_INTERVAL_S, SWEEP_LATE_POLICY, SWEEP_MAX_LAG_S,
+                            SWEEP_OFFSET_S)
+
+LATE_POLICIES = ("skip", "compress")
+
+
+class SlotScheduler:
+    """Runs a job on fixed wall-clock slots.
+
+    Slots are ``offset_s + k * interval_s`` seconds since the epoch. The
+    wait for each slot is computed from the clock rather than by adding
+    up sleeps, so start times don't drift with the length of the sweeps.
+    At most one job runs at a time and missed slots are never queued. A
+    slot that can't start within ``max_lag_s`` is late. With ``"skip"``
+    the scheduler waits for the next slot. With ``"compress"`` it runs the
+    most recent slot immediately and drops the ones before it.
+    """
+
+    def __init__(self, interval_s: float, offset_s: float = 0.0, max_lag_s: float = 30.0,
+                 late_policy: str = "skip", history: int = 20):
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        if late_policy not in LATE_POLICIES:
+            raise ValueError(f"late_policy must be one of {LATE_POLICIES}, got {late_policy!r}")
+        self.interval_s = interval_s
+        self.offset_s = offset_s % interval_s
+        self.max_lag_s = max_lag_s
+        self.late_policy = late_policy
+        self.sweeps = 0
+        self.failed = 0
+        self.skipped_slots = 0
+        self.overruns = 0
+        self.max_lag_seen_s = 0.0
+        self.next_slot: Optional[float] = None
+        self.recent: deque = deque(maxlen=history)
+
+    def slot_at(self, t: float) -> float:
+        """Start of the slot containing time ``t``."""
+        return math.floor((t - self.offset_s) / self.interval_s) * self.interval_s + self.offset_s
+
+    async def run(self, job: Callable[[datetime], Awaitable]):
+        """Call ``job(slot start)`` on every slot, until cancelled."""
+        slot = self.slot_at(time.time())
+        while True:
+            self.next_slot = slot
+            now = time.time()
+            if now < slot:
+                await asyncio.sleep(slot - now)
+                now = time.time()
+            if now - slot > self.max_lag_s:
+                latest = self.slot_at(now)
+                target = latest if self.late_policy == "compress" else latest + self.interval_s
+                self.skipped_slots += round((target - slot) / self.interval_s)
+                print(f"Sweep for {datetime.fromtimestamp(slot)} is {now - slot:.1f}s late, "
+                      f"{self.late_policy} to {datetime.fromtimestamp(target)}")
+                slot = target
+                if target > now:
+                    continue
+            await self._run_slot(job, slot, now)
+            slot += self.interval_s
+
+    async def _run_slot(self, job: Callable[[datetime], Awaitable], slot: float, started: float):
+        lag = started - slot
+        error = None
+        try:
+            await job(datetime.fromtimestamp(slot))
+        except Exception as e:
+            self.failed += 1
+            error = repr(e)
+            print(f"Sweep for {datetime.fromtimestamp(slot)} failed: {e!r}")
+        finished = time.time()
+        overrun = max(0.0, finished - (slot + self.interval_s))
+        self.sweeps += 1
+        self.overruns += overrun > 0
+        self.max_lag_seen_s = max(self.max_lag_seen_s, lag)
+        self.recent.append({
+            "slot": datetime.fromtimestamp(slot).isoformat(),
+            "lag_s": lag,
+            "duration_s": finished - started,
+            "overrun_s": overrun,
+            "error": error,
+        })
+
+    def stats(self) -> Dict:
+        return {
+            "interval_s": self.interval_s,
+            "offset_s": self.offset_s,
+            "late_policy": self.late_policy,
+            "next_slot": datetime.fromtimestamp(self.next_slot).isoformat() if self.next_slot else None,
+            "sweeps": self.sweeps,
+            "failed": self.failed,
+            "skipped_slots": self.skipped_slots,
+            "overruns": self.overruns,
+            "max_lag_s": self.max_lag_seen_s,
+            "recent": list(self.recent),
+        }
+
+
+scheduler = SlotScheduler(SWEEP_INTERVAL_S, SWEEP_OFFSET_S, SWEEP_MAX_LAG_S, SWEEP_LATE_POLICY, PIPELINE_HISTORY)
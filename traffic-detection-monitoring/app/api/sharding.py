@@ -0,0 +1,210 @@
+import asyncio
+import bisect
+import hashlib
+import os
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from databases import Database
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.schema import CreateTable
+
+from app.api.config import (REPLICA_ID, SHARD_LEASE_BACKEND, SHARD_LEASE_DIR, SHARD_LEASE_TTL_S, SHARD_VNODES,
+                            SHARDING_ENABLED)
+from app.api.database import database, monitor_leases
+
+# Leases this long expired belong to replicas that died; their rows/files are removed
+LEASE_RETENTION_S = 3600
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring: each key belongs to the first replica point after it.
+
+    Every replica is placed at ``vnodes`` points, so when one joins or
+    leaves only the cameras next to its points change owner (about 1/N of
+    them) and the rest stay where they are.
+    """
+
+    def __init__(self, members: List[str], vnodes: int):
+        points = sorted((_hash(f"{member}#{i}"), member) for member in members for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._members = [member for _, member in points]
+
+    def owner(self, key: str) -> str:
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._members[i]
+
+
+class PostgresLeases:
+    """Replica leases as rows of monitor_leases, timed by the database clock."""
+
+    def __init__(self, db: Database, ttl_s: float):
+        self.db = db
+        self.ttl_s = ttl_s
+
+    async def setup(self):
+        await self.db.execute(CreateTable(monitor_leases, if_not_exists=True))
+
+    async def renew(self, replica_id: str):
+        stmt = pg_insert(monitor_leases).values(replicaId=replica_id,
+                                                expiresAt=func.now() + timedelta(seconds=self.ttl_s))
+        stmt = stmt.on_conflict_do_update(index_elements=['replicaId'], set_={'expiresAt': stmt.excluded.expiresAt})
+        await self.db.execute(stmt)
+        await self.db.execute(delete(monitor_leases).where(
+            monitor_leases.c.expiresAt < func.now() - timedelta(seconds=LEASE_RETENTION_S)))
+
+    async def members(self) -> List[str]:
+        rows = await self.db.fetch_all(
+            select(monitor_leases.c.replicaId).where(monitor_leases.c.expiresAt > func.now()))
+        return [row['replicaId'] for row in rows]
+
+    async def release(self, replica_id: str):
+        await self.db.execute(delete(monitor_leases).where(monitor_leases.c.replicaId == replica_id))
+
+
+class FileLeases:
+    """Replica leases as files holding their expiry time, for replicas sharing a host."""
+
+    def __init__(self, directory: str, ttl_s: float):
+        self.directory = directory
+        self.ttl_s = ttl_s
+
+    async def setup(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    async def renew(self, replica_id: str):
+        path = os.path.join(self.directory, f"{replica_id}.lease")
+        with open(path + ".tmp", "w") as f:
+            f.write(str(time.time() + self.ttl_s))
+        os.replace(path + ".tmp", path)  # readers never see a half-written lease
+
+    async def members(self) -> List[str]:
+        now = time.time()
+        alive = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".lease"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as f:
+                    expires_at = float(f.read())
+            except (OSError, ValueError):
+                continue
+            if expires_at > now:
+                alive.append(name[:-len(".lease")])
+            elif expires_at < now - LEASE_RETENTION_S:
+                os.remove(path)
+        return alive
+
+    async def release(self, replica_id: str):
+        try:
+            os.remove(os.path.join(self.directory, f"{replica_id}.lease"))
+        except FileNotFoundError:
+            pass
+
+
+class Sharding:
+    """Splits the cameras between the monitor replicas that are alive.
+
+    Each replica renews a lease every third of ``ttl_s``. Before a sweep
+    it reads the replicas with a live lease and keeps the cameras that
+    the hash ring of those replicas assigns to it. When a replica joins
+    or its lease runs out, the others pick up the change on their next
+    sweep. If the lease store can't be reached, the last known members
+    are used. Replicas can briefly disagree while membership changes and
+    poll the same camera in one slot. Results are keyed by camera and
+    slot, so the database keeps only one of them.
+    """
+
+    def __init__(self, leases, replica_id: str, ttl_s: float, vnodes: int, enabled: bool):
+        self.leases = leases
+        self.replica_id = replica_id
+        self.ttl_s = ttl_s
+        self.vnodes = vnodes
+        self.enabled = enabled
+        self.members: List[str] = [replica_id]
+        self._ring = HashRing(self.members, vnodes)
+        self._task: Optional[asyncio.Task] = None
+        self.rebalances = 0
+        self.lease_errors = 0
+        self.last_error: Optional[str] = None
+        self.owned = 0
+        self.total = 0
+
+    async def start(self):
+        if not self.enabled:
+            return
+        await self.leases.setup()
+        await self._renew()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        # Let the other replicas take over our cameras right away instead of after the TTL
+        try:
+            await self.leases.release(self.replica_id)
+        except Exception as e:
+            print(f"Error releasing the shard lease of {self.replica_id}: {e!r}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl_s / 3)
+            await self._renew()
+
+    async def _renew(self):
+        try:
+            await self.leases.renew(self.replica_id)
+        except Exception as e:
+            self.lease_errors += 1
+            self.last_error = repr(e)
+            print(f"Error renewing the shard lease of {self.replica_id}: {e!r}")
+
+    async def _refresh_members(self):
+        try:
+            members = await self.leases.members()
+        except Exception as e:
+            self.lease_errors += 1
+            self.last_error = repr(e)
+            print(f"Error reading shard leases, keeping {len(self.members)} known replicas: {e!r}")
+            return
+        members = sorted(set(members) | {self.replica_id})
+        if members != self.members:
+            print(f"Shard members changed from {self.members} to {members}")
+            self.members = members
+            self._ring = HashRing(members, self.vnodes)
+            self.rebalances += 1
+
+    async def select(self, cameras: List[dict]) -> List[dict]:
+        """The cameras this replica polls."""
+        if not self.enabled:
+            return cameras
+        await self._refresh_members()
+        owned = [camera for camera in cameras if self._ring.owner(camera['_id']) == self.replica_id]
+        self.owned, self.total = len(owned), len(cameras)
+        return owned
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "replica": self.replica_id,
+            "members": self.members,
+            "owned_cameras": self.owned,
+            "total_cameras": self.total,
+            "rebalances": self.rebalances,
+            "lease_errors": self.lease_errors,
+            "last_error": self.last_error,
+        }
+
+
+leases = (FileLeases(SHARD_LEASE_DIR, SHARD_LEASE_TTL_S) if SHARD_LEASE_BACKEND == "file"
+          else PostgresLeases(database, SHARD_LEASE_TTL_S))
+sharding = Sharding(leases, REPLICA_ID, SHARD_LEASE_TTL_S, SHARD_VNODES, SHARDING_ENABLED)
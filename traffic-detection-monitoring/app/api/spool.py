@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class ResultSpool:
+    """On-disk, append-only queue of detection result rows.
+
+    Rows are stored in a local SQLite database in WAL mode, so they survive
+    restarts and database outages. Disk usage is bounded by ``max_bytes``:
+    when the spool grows past it the oldest rows are dropped. Rows are
+    removed in insertion order, so whole pages are freed and reused rather
+    than the file growing. Duplicates are not filtered here; replay is
+    made idempotent by the database skipping known detectionIds.
+
+    Methods block on disk I/O; call them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.dropped = 0
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL)"
+        )
+        self.pending = self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def append(self, rows: List[Dict]):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT INTO spool (row) VALUES (?)", [(json.dumps(row),) for row in rows])
+            self.pending += len(rows)
+            self._enforce_limit()
+
+    def oldest(self, limit: int) -> List[Tuple[int, Dict]]:
+        """Up to ``limit`` (seq, row) pairs, oldest first."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT seq, row FROM spool ORDER BY seq LIMIT ?", (limit,))
+            return [(seq, json.loads(row)) for seq, row in cursor]
+
+    def remove(self, last_seq: int):
+        """Drop every row up to and including ``last_seq`` (they reached the database)."""
+        with self._lock:
+            with self._conn:
+                removed = self._conn.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,)).rowcount
+            self.pending -= removed
+
+    def size_bytes(self) -> int:
+        """Bytes held by live rows; freed pages are reused before the file grows."""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _enforce_limit(self):
+        while self.pending and self.size_bytes() > self.max_bytes:
+            # Drop a tenth of the rows at a time, oldest first
+            count = max(1, self.pending // 10)
+            with self._conn:
+                removed = self._conn.execute(
+                    "DELETE FROM spool WHERE seq IN (SELECT seq FROM spool ORDER BY seq LIMIT ?)", (count,)
+                ).rowcount
+            self.pending -= removed
+            self.dropped += removed
+            print(f"Result spool over {self.max_bytes} bytes, dropped the {removed} oldest rows")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size = self.size_bytes() if self._conn is not None else 0
+        return {"path": self.path, "pending": self.pending, "bytes": size, "max_bytes": self.max_bytes,
+                "dropped_rows": self.dropped}
@@ -1,81 +1,151 @@
-import httpx
+import asyncio
 import io
+import json
+import httpx
 from PIL import Image
 from app.api import db_manager
-from databases import Database
-from app.api.database import get_db
-from uuid import uuid4
+from app.api.breaker import breakers
+from app.api.catalog import camera_catalog
+from app.api.config import (CAMERA_SERVICE_URL, DETECTION_SERVICE_URL, DETECTION_TIMEOUT_S, IMAGE_CONNECT_TIMEOUT_S,
+                            IMAGE_READ_TIMEOUT_S, IMAGE_TIMEOUT_S, TRACK_VEHICLES)
+from app.api.http_clients import clients
+from app.api.pipeline import run_sweep
+from app.api.polling import poll_planner
+from app.api.sharding import sharding
+from app.api.writer import result_writer
+from uuid import NAMESPACE_URL, uuid4, uuid5
 from datetime import datetime
 
-CAMERA_SERVICE_URL = "http://localhost:8002"
-DETECTION_SERVICE_URL = "http://localhost:8003"
+clients.register("camera", base_url=CAMERA_SERVICE_URL)
+clients.register("detection", base_url=DETECTION_SERVICE_URL, timeout=DETECTION_TIMEOUT_S)
+# Camera snapshots from the city's image server
+clients.register("upstream", headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True)
+IMAGE_TIMEOUT = httpx.Timeout(IMAGE_READ_TIMEOUT_S, connect=IMAGE_CONNECT_TIMEOUT_S)
+# detectionIds of scheduled sweeps are derived from camera and slot
+DETECTION_NAMESPACE = uuid5(NAMESPACE_URL, "traffic-detection-monitoring/detections")
+
+async def traffic_detection_task(slot: datetime = None):
+    """Sweep every camera once
 
-async def traffic_detection_task():
-    db = await get_db()
+    Args:
+        slot (datetime): Start of the scheduler slot the sweep belongs to
+    """
     # Xử lý nhiệm vụ phát hiện phương tiện
     # print("Đang xử lý nhiệm vụ phát hiện phương tiện...")
     
-    # Lấy danh sách camera từ API
-    cameraList = await get_cameras()
-    currentTime = datetime.now()
-    
-    # Duyệt qua từng camera và in ra thông tin
-    for camera in cameraList:
-        # print(f"Camera ID: {camera['_id']}, Name: {camera['name']}, liveviewUrl: {camera['liveviewUrl']}")
-        if not camera['liveviewUrl'].startswith('http'):
-            # print(f"Skipping camera {camera['_id']} due to invalid liveviewUrl: {camera['liveviewUrl']}")
-            continue
-        # Lấy hình ảnh từ URL liveviewUrl
-        image = await get_image(camera['liveviewUrl'])
-        detection_results = await detect_vehicles(image)
-        # Write detection results to database
-        await write_detection_results_to_db(db, detection_results, camera, currentTime)
-        # break
-        
-    # print("Nhiệm vụ phát hiện phương tiện đã hoàn thành.")
-    
-async def get_cameras():
-    async with httpx.AsyncClient(base_url=CAMERA_SERVICE_URL) as client:
-        response = await client.get("/cameras")
-        response.raise_for_status()
-        cameras = response.json()
-        return cameras
+    # Checked before every sweep, so both the first sweep and the ones after
+    # a detection service restart wait until its models are warmed up
+    if not await detector_ready():
+        print(f"Sweep{f' for {slot}' if slot else ''} skipped, detection service not ready")
+        return
+
+    # Lấy danh sách camera từ API (cached, refreshed in the background)
+    cameraList = await camera_catalog.get()
+    cameras = [camera for camera in cameraList if camera['liveviewUrl'].startswith('http')]
+    # With SHARDING_ENABLED, only the cameras the hash ring assigns to this replica
+    owned = await sharding.select(cameras)
+    # Cameras whose snapshots keep failing sit out until their back-off ends
+    cameras = [camera for camera in owned if breakers.allow(camera['_id'])]
+    # Within POLL_FPS_BUDGET, cameras whose counts change most are polled most often;
+    # cameras sitting out keep their history
+    cameras = poll_planner.plan(cameras, slot or datetime.now(), catalog=owned)
+
+    # Fetch, detect and write run as concurrent stages, so one slow camera
+    # no longer holds up every camera after it. Each row carries the time
+    # its snapshot was taken, not the sweep start.
+    async def fetch(camera):
+        try:
+            image = await asyncio.wait_for(get_image(camera['liveviewUrl']), IMAGE_TIMEOUT_S)
+        except Exception as e:
+            breakers.failure(camera['_id'], e)
+            raise
+        breakers.success(camera['_id'])
+        return image, datetime.now()
+
+    async def detect(camera, sample):
+        image, sampled_at = sample
+        return await detect_vehicles(image, camera.get('roi'), camera['_id']), sampled_at
+
+    async def write(camera, result):
+        detection_results, sampled_at = result
+        poll_planner.observe(camera['_id'], detection_results, sampled_at)
+        await write_detection_results_to_db(detection_results, camera, sampled_at, slot)
+
+    report = await run_sweep(cameras, fetch, detect, write)
+    print(f"Sweep{f' for {slot}' if slot else ''} of {report.cameras} cameras finished in {report.duration_s:.1f}s: "
+          f"{report.done['write']} written, errors {report.errors}, abandoned {report.abandoned}, "
+          f"{breakers.stats()['open']} cameras open-circuited")
     
+async def detector_ready() -> bool:
+    """Whether the detection service reports ready (warmed up) on /ready
+
+    Returns:
+        bool: False while it warms up (503) or cannot be reached
+    """
+    try:
+        response = await clients.get("detection").get("/ready")
+    except httpx.HTTPError:
+        return False
+    return response.status_code == 200
+
 async def get_image(liveviewUrl: str):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(liveviewUrl, headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True)
-        response.raise_for_status()
-        image_data = response.content
-        return image_data
+    response = await clients.get("upstream").get(liveviewUrl, timeout=IMAGE_TIMEOUT)
+    response.raise_for_status()
+    image_data = response.content
+    return image_data
 
-async def detect_vehicles(image: bytes):
+async def detect_vehicles(image: bytes, roi: list = None, camera_id: str = None):
     """Detect vehicles in the image using detection service
     
     Args:
-        image (Image): The input image in PIL RGB format
+        image (bytes): The encoded input image
+        roi (list): Optional region of interest of the camera, [[x, y], ...]
+            normalised to the frame size; vehicles outside it are not counted
+        camera_id (str): Camera id, selects the camera's detection profile
     
     Returns:
-        dict: Detection results
+        dict: Detection results. With TRACK_VEHICLES, the numberOf* counts
+        are the vehicles seen for the first time since the camera's previous frame
     """
-    async with httpx.AsyncClient(base_url=DETECTION_SERVICE_URL) as client:
-        files = {'file': ('image.jpg', image, 'image/jpeg')}
-        response = await client.post("/detect-vehicles", files=files)
+    client = clients.get("detection")
+    files = {'file': ('image.jpg', image, 'image/jpeg')}
+    data = {'camera_id': camera_id} if camera_id else {}
+    if roi:
+        data['roi'] = json.dumps(roi)
+    if TRACK_VEHICLES and camera_id:
+        response = await client.post("/track-vehicles", files=files, data=data)
         response.raise_for_status()
         detection_results = response.json()
-        return detection_results
+        return {**detection_results, **detection_results['newVehicles']}
+    response = await client.post("/detect-vehicles", files=files, data=data)
+    response.raise_for_status()
+    detection_results = response.json()
+    return detection_results
+    
+async def write_detection_results_to_db(detection_results: dict, camera_info: dict, sampled_at: datetime,
+                                        slot: datetime = None):
+    """Queue detection results for the database
     
-async def write_detection_results_to_db(db: Database, detection_results: dict, camera_info: dict, current_time: datetime):
-    """Write detection results to the database
+    Rows are spooled to disk by the result writer and inserted in bulk.
+    Rows of a scheduled sweep get the same detectionId for the same camera
+    and slot, so a camera polled twice in one slot (e.g. by two replicas
+    while shards rebalance) is stored once.
     
     Args:
-        db (Database): The database connection
         detection_results (dict): The detection results to write
+        camera_info (dict): The camera the results belong to
+        sampled_at (datetime): When the camera's snapshot was fetched
+        slot (datetime): Scheduler slot of the sweep, if any
     """
+    if slot is not None:
+        detection_id = str(uuid5(DETECTION_NAMESPACE, f"{camera_info['_id']}/{slot.isoformat()}"))
+    else:
+        detection_id = str(uuid4())  # Generate a unique ID for the detection result
     rs = db_manager.DetectionResults(
-        detectionId=str(uuid4()),  # Generate a unique ID for the detection result
+        detectionId=detection_id,
         cameraId=camera_info['_id'],
-        date=current_time.strftime('%Y-%m-%d'),
-        time=current_time.strftime('%H:%M:%S'),
+        date=sampled_at.strftime('%Y-%m-%d'),
+        time=sampled_at.strftime('%H:%M:%S'),
         numberOfBicycle=detection_results.get('numberOfBicycle', 0),
         numberOfMotorcycle=detection_results.get('numberOfMotorcycle', 0),
         numberOfCar=detection_results.get('numberOfCar', 0),
@@ -85,7 +155,7 @@ async def write_detection_results_to_db(db: Database, detection_results: dict, c
         numberOfFireTruck=detection_results.get('numberOfFireTruck', 0),
         numberOfContainer=detection_results.get('numberOfContainer', 0),
     )
-    await db_manager.write_detection_result_to_db(db, rs.__dict__)
+    await result_writer.add(rs.__dict__)
     
 def get_image_from_bytes(binary_image: bytes) -> Image:
     """Convert image from bytes to PIL RGB format
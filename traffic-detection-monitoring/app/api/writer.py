@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from databases import Database
+
+from app.api import db_manager
+from app.api.config import SPOOL_MAX_MB, SPOOL_PATH, WRITER_BATCH_ROWS, WRITER_FLUSH_INTERVAL_S
+from app.api.database import database
+from app.api.spool import ResultSpool
+
+
+class ResultWriter:
+    """Durable write-behind for detection results.
+
+    ``add`` only appends the row to the on-disk spool, so polling never
+    waits on the database. A background task replays spooled rows in
+    multi-row INSERTs of up to ``batch_rows``, as soon as that many are
+    waiting and at least every ``flush_interval_s``, and removes them from
+    the spool once inserted. While the database is unreachable rows stay
+    spooled (and survive restarts) and the flush is retried every
+    ``flush_interval_s``. Replay skips detectionIds already stored, so a
+    batch inserted just before a crash is not written twice.
+    """
+
+    def __init__(self, db: Database, spool: ResultSpool, batch_rows: int, flush_interval_s: float):
+        self.db = db
+        self.spool = spool
+        self.batch_rows = max(1, batch_rows)
+        self.flush_interval_s = flush_interval_s
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        await asyncio.to_thread(self.spool.open)
+        if self.spool.pending:
+            print(f"Replaying {self.spool.pending} spooled detection results")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Whatever can't be written now stays spooled for the next start
+        await self.flush()
+        await asyncio.to_thread(self.spool.close)
+
+    async def add(self, row: dict):
+        await asyncio.to_thread(self.spool.append, [row])
+        if self.spool.pending >= self.batch_rows:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not await self.flush():
+                # Don't hammer an unreachable database on every new row
+                await asyncio.sleep(self.flush_interval_s)
+
+    async def flush(self) -> bool:
+        """Replay the spool to the database; False if an insert failed."""
+        async with self._lock:
+            while True:
+                batch = await asyncio.to_thread(self.spool.oldest, self.batch_rows)
+                if not batch:
+                    return True
+                started = time.perf_counter()
+                try:
+                    await db_manager.write_detection_results_bulk(self.db, [row for _, row in batch])
+                except Exception as e:
+                    self.failed_flushes += 1
+                    self.last_error = str(e)
+                    print(f"Error writing {len(batch)} detection results to database, keeping them spooled: {e}")
+                    return False
+                await asyncio.to_thread(self.spool.remove, batch[-1][0])
+                self.flushes += 1
+                self.rows_written += len(batch)
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def stats(self) -> Dict:
+        return {
+            "spool": self.spool.stats(),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error,
+        }
+
+
+result_writer = ResultWriter(
+    database, ResultSpool(SPOOL_PATH, int(SPOOL_MAX_MB * 2**20)), WRITER_BATCH_ROWS, WRITER_FLUSH_INTERVAL_S
+)
@@ -2,6 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.database import metadata, database, engine
 from app.api.vehicle_detection_task import traffic_detection_task
+from app.api.monitor import monitor
+from app.api.http_clients import clients
+from app.api.writer import result_writer
+from app.api.catalog import camera_catalog
+from app.api.sharding import sharding
+from app.api.scheduler import scheduler
 import asyncio
 from app.api.database import engine, Base
 import time
@@ -22,17 +28,25 @@ Base.metadata.create_all(bind=engine)
 @app.on_event("startup")
 async def start_scheduler():
     await database.connect()
+    clients.start()
+    await result_writer.start()
+    camera_catalog.start()
+    await sharding.start()
     # metadata.create_all(engine)
-    asyncio.create_task(timer_task())
+    app.state.timer_task = asyncio.create_task(timer_task())
     
 async def timer_task():
-    while True:
-    # start_time = time.time()
-    # print("Thực hiện nhiệm vụ.")
-        await traffic_detection_task()
-    # elapsed = time.time() - start_time
-    # print(f"Xử lý xong. Thời gian thực hiện: {elapsed:.2f} giây.")
+    # One sweep per wall-clock slot (SWEEP_INTERVAL_S); late slots are skipped or compressed
+    await scheduler.run(traffic_detection_task)
     
 @app.on_event("shutdown")
 async def shutdown():
-    await database.disconnect()
\ No newline at end of file
+    app.state.timer_task.cancel()
+    await camera_catalog.stop()
+    await sharding.stop()
+    # Spooled rows go out before the connection closes (or wait on disk for the next start)
+    await result_writer.stop()
+    await clients.close()
+    await database.disconnect()
+
+app.include_router(monitor, tags=['monitor'])
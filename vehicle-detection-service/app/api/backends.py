@@ -0,0 +1,74 @@
+import shutil
+from pathlib import Path
+
+from ultralytics import YOLO
+
+from .config import (MODEL_BACKEND, MODEL_CACHE_DIR, MODEL_IMGSZ, MODEL_INT8,
+                     MODEL_INT8_DATA, MODEL_PATH)
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def cached_model_path(weights: str, backend: str, int8: bool, cache_dir: str = MODEL_CACHE_DIR) -> Path:
+    """Where the exported model for ``backend`` lives in the cache.
+
+    Ultralytics picks the runtime from the file name, so OpenVINO models must
+    stay in a directory ending with ``_openvino_model``.
+    """
+    stem = Path(weights).stem + ("_int8" if int8 else "")
+    if backend == "onnx":
+        return Path(cache_dir) / f"{stem}.onnx"
+    return Path(cache_dir) / f"{stem}_openvino_model"
+
+
+def _quantize_onnx(src: Path, dst: Path):
+    # Dynamic quantisation: INT8 weights, activations quantised on the fly,
+    # no calibration data needed
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QUInt8)
+
+
+def export_model(weights: str, backend: str, int8: bool, cache_dir: str = MODEL_CACHE_DIR) -> Path:
+    """Export ``weights`` to ``backend`` and store the result in the cache."""
+    if backend == "openvino" and int8:
+        try:
+            import nncf  # noqa: F401
+        except ImportError:
+            raise RuntimeError("MODEL_INT8 with the openvino backend needs nncf for calibration "
+                               "(pip install nncf)") from None
+    target = cached_model_path(weights, backend, int8, cache_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    model = YOLO(weights, task='detect')
+    if backend == "onnx":
+        exported = Path(model.export(format="onnx", imgsz=MODEL_IMGSZ, dynamic=True, simplify=True))
+        if int8:
+            _quantize_onnx(exported, target)
+            exported.unlink(missing_ok=True)
+        else:
+            shutil.move(str(exported), target)
+    else:
+        exported = Path(model.export(
+            format="openvino", imgsz=MODEL_IMGSZ, dynamic=True, int8=int8, data=MODEL_INT8_DATA if int8 else None,
+        ))
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+    return target
+
+
+def prepare_model(weights: str = MODEL_PATH, backend: str = MODEL_BACKEND, int8: bool = MODEL_INT8) -> str:
+    """Return the path the inference workers should load.
+
+    For the ``torch`` backend this is the original weights file. Other backends
+    are exported on first use and re-used from the cache afterwards.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}. Expected one of {BACKENDS}")
+    if backend == "torch":
+        return weights
+    target = cached_model_path(weights, backend, int8)
+    if not target.exists():
+        print(f"Exporting {weights} to {backend}{' (INT8)' if int8 else ''}, caching in {target}")
+        target = export_model(weights, backend, int8)
+    return str(target)
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+WAIT_MS_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+
+def _fail_stopped(entries: List[tuple]):
+    for _, future, _ in entries:
+        if not future.done():
+            future.set_exception(RuntimeError("Inference batcher stopped"))
+
+
+class InferenceBatcher:
+    """Collects concurrent inference requests into micro-batches.
+
+    Requests are queued by ``submit``; a single worker task takes the first
+    pending item, then keeps collecting until either ``max_batch_size`` items
+    are gathered or ``max_wait_ms`` has elapsed, and awaits ``infer_batch``
+    once for the whole batch. At most ``max_concurrency`` batches run at the
+    same time; while they do, new requests pile up in the queue, so the batch
+    size adapts to the load.
+
+    ``infer_batch`` returns one result per item; an ``Exception`` in place of
+    a result is raised to that item's caller only.
+    """
+
+    def __init__(
+        self,
+        infer_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_concurrency: int = 1,
+    ):
+        self.infer_batch = infer_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms_hist = Histogram(WAIT_MS_BUCKETS)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        # Fail whatever is still waiting so callers don't hang
+        while self._queue is not None and not self._queue.empty():
+            _fail_stopped([self._queue.get_nowait()])
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its own result."""
+        if self._worker is None:
+            raise RuntimeError("Inference batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        try:
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Items already taken off the queue are no longer failed by stop()
+            _fail_stopped(batch)
+            raise
+        return batch
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.max_concurrency)
+        while True:
+            # Only start collecting once a worker is free, so requests keep
+            # accumulating into the next batch while all workers are busy
+            await slots.acquire()
+            batch = await self._collect()
+            # Callers that gave up (client disconnected) don't need a slot in the batch
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                slots.release()
+                continue
+
+            started = time.perf_counter()
+            self.batch_size_hist.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.wait_ms_hist.observe((started - enqueued_at) * 1000)
+
+            task = asyncio.create_task(self._dispatch(batch, slots))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[tuple], slots: asyncio.Semaphore):
+        try:
+            results = await self.infer_batch([item for item, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        except asyncio.CancelledError:
+            _fail_stopped(batch)
+            raise
+        finally:
+            slots.release()
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrency": self.max_concurrency,
+            "batches_in_flight": len(self._inflight),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "wait_ms": self.wait_ms_hist.snapshot(),
+        }
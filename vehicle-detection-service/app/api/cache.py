@@ -0,0 +1,70 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def frame_hash(image_bytes: bytes, salt: bytes = b"") -> bytes:
+    """Fast content hash of the raw (encoded) frame bytes.
+
+    ``salt`` covers request options that change the result for the same
+    frame (e.g. the ROI).
+    """
+    digest = hashlib.blake2b(image_bytes, digest_size=16)
+    digest.update(salt)
+    return digest.digest()
+
+
+class ResultCache:
+    """Bounded LRU cache with a per-entry time-to-live.
+
+    A capacity of 0 disables the cache.
+    """
+
+    def __init__(self, capacity: int, ttl_s: float):
+        self.capacity = max(0, capacity)
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict = OrderedDict()  # key -> (stored_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.capacity:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_s:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        if not self.capacity:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "ttl_s": self.ttl_s,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,63 @@
+import json
+import os
+from typing import Dict, Optional
+
+from .config import CAMERA_PROFILES_PATH, SLICE_ENABLED, SLICE_OVERLAP, SLICE_TILE_SIZE
+from .slicing import SliceConfig, check_slicing
+
+# Example camera_profiles.json:
+# {
+#   "default": {"slicing": {"enabled": false}},
+#   "cameras": {
+#     "5d8cd49f766c880017188938": {"slicing": {"enabled": true, "tile_size": 512, "overlap": 0.25}}
+#   }
+# }
+
+
+def load_profiles(path: str = CAMERA_PROFILES_PATH) -> Dict:
+    """Read and check the profiles file; missing file means no profiles.
+
+    Raises:
+        ValueError: If a slicing setting (or its SLICE_* default) is invalid,
+            so a typo fails at startup rather than stalling inference.
+    """
+    profiles = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            profiles = json.load(f)
+    entries = [("default", profiles.get("default", {}))] + list(profiles.get("cameras", {}).items())
+    for name, profile in entries:
+        settings = {"tile_size": SLICE_TILE_SIZE, "overlap": SLICE_OVERLAP, **profile.get("slicing", {})}
+        try:
+            check_slicing(int(settings["tile_size"]), float(settings["overlap"]))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid slicing settings for {name!r} (SLICE_* or {path}): {e}") from None
+    return profiles
+
+
+profiles = load_profiles()
+
+
+def camera_profile(camera_id: Optional[str]) -> Dict:
+    """Settings for one camera: its own entry merged over the defaults."""
+    default = profiles.get("default", {})
+    own = profiles.get("cameras", {}).get(camera_id, {}) if camera_id else {}
+    return {key: {**default.get(key, {}), **own.get(key, {})} for key in set(default) | set(own)}
+
+
+def slicing_for(camera_id: Optional[str], enabled: Optional[bool] = None) -> Optional[SliceConfig]:
+    """Sliced inference settings for a camera, or None when it is disabled.
+
+    ``enabled`` overrides the configured on/off switch for one request.
+    """
+    settings = {"enabled": SLICE_ENABLED, "tile_size": SLICE_TILE_SIZE, "overlap": SLICE_OVERLAP}
+    settings.update(camera_profile(camera_id).get("slicing", {}))
+    if enabled is not None:
+        settings["enabled"] = enabled
+    if not settings["enabled"]:
+        return None
+    return SliceConfig(
+        tile_size=int(settings["tile_size"]),
+        overlap=float(settings["overlap"]),
+        full_frame=bool(settings.get("full_frame", True)),
+    )
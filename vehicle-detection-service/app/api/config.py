@@ -0,0 +1,85 @@
+import os
+
+# Model
+MODEL_PATH = os.getenv("MODEL_PATH", "yolov10n.pt")
+
+# Micro-batching of /detect-vehicles requests
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "20"))
+
+# Inference executor: "thread" or "process"
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_PIN_CPUS = os.getenv("INFERENCE_PIN_CPUS", "true").lower() == "true"
+
+# Model backend: "torch", "onnx" or "openvino". Non-torch backends are
+# exported once at startup and cached in MODEL_CACHE_DIR.
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+MODEL_INT8 = os.getenv("MODEL_INT8", "false").lower() == "true"
+MODEL_INT8_DATA = os.getenv("MODEL_INT8_DATA", "coco8.yaml")  # OpenVINO INT8 calibration set
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+MODEL_IMGSZ = int(os.getenv("MODEL_IMGSZ", "640"))
+
+# Sample frames used by the parity check and benchmarks
+SAMPLES_DIR = os.getenv("SAMPLES_DIR", "samples")
+
+# Maximum number of frames accepted by /detect-vehicles/batch
+BATCH_REQUEST_MAX_FRAMES = int(os.getenv("BATCH_REQUEST_MAX_FRAMES", "64"))
+
+# Decode JPEGs at reduced resolution straight into a letterboxed input buffer
+FAST_DECODE = os.getenv("FAST_DECODE", "true").lower() == "true"
+
+# Cache of detection results keyed by a hash of the raw frame bytes
+RESULT_CACHE_CAPACITY = int(os.getenv("RESULT_CACHE_CAPACITY", "1024"))  # 0 disables the cache
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "300"))
+
+# Warm-up before the service reports ready. Each batch size is run until
+# the slowest call of the last WARMUP_MIN_ITERATIONS is within
+# WARMUP_TOLERANCE of the window before it (or WARMUP_MAX_ITERATIONS is hit).
+WARMUP_BATCH_SIZES = [int(b) for b in os.getenv("WARMUP_BATCH_SIZES", f"1,{BATCH_MAX_SIZE}").split(",") if b.strip()]
+WARMUP_MIN_ITERATIONS = int(os.getenv("WARMUP_MIN_ITERATIONS", "3"))
+WARMUP_MAX_ITERATIONS = int(os.getenv("WARMUP_MAX_ITERATIONS", "20"))
+WARMUP_TOLERANCE = float(os.getenv("WARMUP_TOLERANCE", "0.1"))
+
+# Sliced (tiled) inference for small, distant vehicles. These are the
+# defaults; CAMERA_PROFILES_PATH can override them per camera.
+SLICE_ENABLED = os.getenv("SLICE_ENABLED", "false").lower() == "true"
+SLICE_TILE_SIZE = int(os.getenv("SLICE_TILE_SIZE", "640"))
+SLICE_OVERLAP = float(os.getenv("SLICE_OVERLAP", "0.2"))
+SLICE_MERGE_THRESHOLD = float(os.getenv("SLICE_MERGE_THRESHOLD", "0.6"))
+# Frames that would need more tiles than this are rejected instead of stalling the batcher
+SLICE_MAX_TILES = int(os.getenv("SLICE_MAX_TILES", "64"))
+
+# Per-camera settings, JSON: {"default": {...}, "cameras": {"<camera id>": {...}}}
+CAMERA_PROFILES_PATH = os.getenv("CAMERA_PROFILES_PATH", "camera_profiles.json")
+
+# Tracking mode (/track-vehicles): IoU association between consecutive
+# frames of a camera, so each vehicle is counted once
+TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+TRACK_HIGH_CONF = float(os.getenv("TRACK_HIGH_CONF", "0.5"))
+TRACK_MIN_HITS = int(os.getenv("TRACK_MIN_HITS", "1"))
+# A track ends after TRACK_MAX_MISSED frames without a match or
+# TRACK_MAX_AGE_S seconds, whichever comes first. IoU association needs a
+# vehicle's boxes to overlap between frames, i.e. frames a few seconds
+# apart; with longer gaps every vehicle is simply counted as new.
+TRACK_MAX_MISSED = int(os.getenv("TRACK_MAX_MISSED", "0"))
+TRACK_MAX_AGE_S = float(os.getenv("TRACK_MAX_AGE_S", "30"))
+TRACK_MAX_CAMERAS = int(os.getenv("TRACK_MAX_CAMERAS", "2048"))
+
+# WebSocket streaming (/ws/detect): frames of one connection being detected at once
+STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", str(BATCH_MAX_SIZE)))
+
+# Annotated frames (/detect/visualize, /detect/images, /detect/annotated)
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "85"))
+# Rendered frames cached by frame hash and render options, 0 disables
+ANNOTATED_CACHE_CAPACITY = int(os.getenv("ANNOTATED_CACHE_CAPACITY", "0"))
+ANNOTATED_CACHE_TTL_S = float(os.getenv("ANNOTATED_CACHE_TTL_S", str(RESULT_CACHE_TTL_S)))
+
+# Frame-difference gate: skip inference when a camera's frame barely
+# differs from the last one that was detected, and carry its counts over
+GATE_ENABLED = os.getenv("GATE_ENABLED", "false").lower() == "true"
+GATE_SIZE = int(os.getenv("GATE_SIZE", "96"))  # side of the grayscale thumbnail compared
+GATE_PIXEL_DELTA = int(os.getenv("GATE_PIXEL_DELTA", "16"))  # grey levels for a thumbnail pixel to count as changed
+GATE_CHANGED_FRACTION = float(os.getenv("GATE_CHANGED_FRACTION", "0.002"))  # changed pixels needed to run inference
+GATE_MAX_CARRY_S = float(os.getenv("GATE_MAX_CARRY_S", "600"))  # re-run inference at least this often
+GATE_MAX_CAMERAS = int(os.getenv("GATE_MAX_CAMERAS", "2048"))
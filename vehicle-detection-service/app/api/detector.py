@@ -0,0 +1,262 @@
+import io
+import os
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from PIL import Image
+from ultralytics import YOLO
+
+from .config import FAST_DECODE, MODEL_PATH
+from .models import DetectionResponse
+from .preprocess import Letterbox, crop_box, decode_letterboxed, input_buffers, unletterbox
+from .roi import Polygon, points_in_polygon, roi_bounds
+from .slicing import SliceConfig, merge_detections, slice_frame
+
+vehicle_classes = ['bicycle', 'motorcycle', 'car', 'van', 'truck', 'bus', 'fire truck', 'container']
+# DetectionResponse count field for each entry of vehicle_classes
+COUNT_FIELDS = ['numberOfBicycle', 'numberOfMotorcycle', 'numberOfCar', 'numberOfVan',
+                'numberOfTruck', 'numberOfBus', 'numberOfFireTruck', 'numberOfContainer']
+label_index = {label: i for i, label in enumerate(vehicle_classes)}
+
+
+class Frame(NamedTuple):
+    """One encoded frame to run detection on, with its camera's optional ROI
+    and sliced inference settings. ``camera_id`` is only used by the
+    frame-difference gate and never reaches the workers' results."""
+    image: bytes
+    roi: Optional[Polygon] = None
+    slicing: Optional[SliceConfig] = None
+    camera_id: Optional[str] = None
+
+
+# Ultralytics predictors are not thread-safe, so every worker thread (or
+# process) gets its own model copy.
+_local = threading.local()
+# Resolved by backends.prepare_model at startup (e.g. a cached ONNX export)
+_model_path = MODEL_PATH
+
+
+def get_model() -> YOLO:
+    model = getattr(_local, "model", None)
+    if model is None:
+        model = _local.model = YOLO(_model_path, task='detect')
+    return model
+
+
+def load_model() -> str:
+    """Load this worker's model; returns the path it was loaded from."""
+    get_model()
+    return _model_path
+
+
+def set_torch_threads(threads: int):
+    torch.set_num_threads(max(1, threads))
+
+
+def init_worker(model_path: str, cpu_queue=None):
+    """Executor initializer: pin the worker to its CPU set and load the model."""
+    global _model_path
+    _model_path = model_path
+    if cpu_queue is not None:
+        cpus = cpu_queue.get()
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        set_torch_threads(len(cpus))
+    get_model()
+
+
+def decode_image(image_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+
+def decode_frame(frame: Frame, slot: Optional[np.ndarray]) -> tuple:
+    """Decode a frame into model input, cropped to the bounding box of its ROI.
+
+    With a ``slot`` the fast path is used (see preprocess.py); otherwise the
+    frame is fully decoded with PIL and only cropped.
+
+    Returns:
+        Tuple[np.ndarray | Image, Letterbox | None]
+    """
+    crop = roi_bounds(frame.roi) if frame.roi else None
+    if slot is not None:
+        return decode_letterboxed(frame.image, slot, crop)
+    image = decode_image(frame.image)
+    if crop is None:
+        return image, None
+    left, top, right, bottom = crop_box(crop, image.width, image.height)
+    return image.crop((left, top, right, bottom)), Letterbox(1.0, 1.0, 0, 0, image.width, image.height, left, top)
+
+
+@lru_cache(maxsize=8)
+def _label_lookup(names: Tuple[Tuple[int, str], ...]) -> np.ndarray:
+    """Model class id -> index into vehicle_classes, or -1 for other classes."""
+    lookup = np.full(max(names)[0] + 1, -1, dtype=np.int64)
+    for cls, label in names:
+        if label in vehicle_classes:
+            lookup[cls] = vehicle_classes.index(label)
+    return lookup
+
+
+def label_lookup(names: dict) -> np.ndarray:
+    return _label_lookup(tuple(sorted(names.items())))
+
+
+def vehicle_class_ids(names: dict) -> List[int]:
+    """Model class ids of the vehicle classes, passed to the model so NMS drops everything else."""
+    return np.flatnonzero(label_lookup(names) >= 0).tolist()
+
+
+def result_arrays(result, letterbox: Optional[Letterbox] = None) -> tuple:
+    """Vehicle detections of one YOLO result as arrays in original frame coordinates.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: index into vehicle_classes
+        (N,), confidence (N,) and xyxy boxes (N, 4)
+    """
+    boxes = result.boxes
+    idx = label_lookup(result.names)[boxes.cls.cpu().numpy().astype(np.int64)]
+    keep = idx >= 0  # no-op when the model was already called with classes=
+    xyxy = boxes.xyxy.cpu().numpy()
+    if letterbox:
+        xyxy = unletterbox(xyxy, letterbox)
+    return idx[keep], boxes.conf.cpu().numpy()[keep], xyxy[keep]
+
+
+def build_response(idx: np.ndarray, conf: np.ndarray, xyxy: np.ndarray, width: int, height: int,
+                   roi: Optional[Polygon] = None) -> DetectionResponse:
+    """Build a DetectionResponse from detection arrays.
+
+    Counts come from one bincount over the class indices and boxes from one
+    bulk tolist(). With a ``roi``, detections whose box centre falls outside
+    it are dropped.
+    """
+    if roi:
+        centres = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+        inside = points_in_polygon(centres, np.asarray(roi) * [width, height])
+        idx, conf, xyxy = idx[inside], conf[inside], xyxy[inside]
+    counts = np.bincount(idx, minlength=len(vehicle_classes)).tolist()
+    # Plain dicts are validated into Detection models by pydantic-core in one go
+    detections_list = [
+        {'label': vehicle_classes[i], 'confidence': c, 'bbox': bbox}
+        for i, c, bbox in zip(idx.tolist(), conf.tolist(), xyxy.tolist())
+    ]
+    return DetectionResponse(
+        detections=detections_list,
+        detect_at=datetime.utcnow().isoformat(),
+        **dict(zip(COUNT_FIELDS, counts)),
+    )
+
+
+def build_detection_response(
+    result, letterbox: Optional[Letterbox] = None, roi: Optional[Polygon] = None
+) -> DetectionResponse:
+    """Turn one YOLO result into a DetectionResponse with per-class counts.
+
+    If the model ran on a letterboxed or cropped frame, boxes are projected
+    back onto the original frame.
+    """
+    height, width = (letterbox.height, letterbox.width) if letterbox else result.orig_shape
+    return build_response(*result_arrays(result, letterbox), width, height, roi)
+
+
+def frame_inputs(frame: Frame, slot: Optional[np.ndarray]) -> list:
+    """Model inputs for one frame: a single one, or one per tile when sliced."""
+    if frame.slicing:
+        return slice_frame(frame.image, roi_bounds(frame.roi) if frame.roi else None, frame.slicing)
+    return [decode_frame(frame, slot)]
+
+
+def detect_batch(frames: List[Frame]) -> List[Union[DetectionResponse, Exception]]:
+    """Decode a batch of frames and run batched forward passes over them.
+
+    With FAST_DECODE, frames are decoded at reduced resolution straight into
+    this worker's preallocated input buffer (see preprocess.py). Sliced
+    frames contribute one input per tile, and all tiles go through the same
+    batched passes. Inputs are grouped by shape (ROI crops change it) so each
+    group keeps its tight stride-aligned size instead of being padded to a
+    common square.
+
+    Args:
+        frames (List[Frame]): Encoded input images with their ROI and slicing settings
+
+    Returns:
+        List[DetectionResponse | Exception]: One entry per input frame, in
+        order. Frames that fail to decode get their exception instead of
+        failing the whole batch.
+    """
+    outputs: List[Union[DetectionResponse, Exception]] = [None] * len(frames)
+    inputs: Dict[tuple, list] = {}  # input shape -> [(frame index, input, letterbox)]
+    parts: Dict[int, list] = {}     # frame index -> detection arrays of each of its inputs
+    slots = input_buffers(len(frames)) if FAST_DECODE else None
+    for i, frame in enumerate(frames):
+        try:
+            frame_parts = frame_inputs(frame, slots[i] if slots is not None else None)
+        except Exception as e:
+            outputs[i] = e
+            continue
+        parts[i] = []
+        for image, letterbox in frame_parts:
+            shape = image.shape if isinstance(image, np.ndarray) else image.size
+            inputs.setdefault(shape, []).append((i, image, letterbox))
+    if not inputs:
+        return outputs
+
+    model = get_model()
+    classes = vehicle_class_ids(model.names)
+    sizes = {}
+    for group in inputs.values():
+        predictions = model([image for _, image, _ in group], classes=classes, verbose=False)
+        for (i, _, letterbox), result in zip(group, predictions):
+            parts[i].append(result_arrays(result, letterbox))
+            sizes[i] = (letterbox.width, letterbox.height) if letterbox else result.orig_shape[::-1]
+
+    for i, arrays in parts.items():
+        idx, conf, xyxy = (np.concatenate(a) for a in zip(*arrays))
+        if len(arrays) > 1:
+            keep = merge_detections(idx, conf, xyxy)
+            idx, conf, xyxy = idx[keep], conf[keep], xyxy[keep]
+        outputs[i] = build_response(idx, conf, xyxy, *sizes[i], frames[i].roi)
+    return outputs
+
+
+def warmup_frame(width: int = 1280, height: int = 720) -> bytes:
+    """Synthetic camera-sized JPEG for warm-up runs."""
+    pixels = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    img_byte_arr = io.BytesIO()
+    Image.fromarray(pixels).save(img_byte_arr, format='JPEG')
+    return img_byte_arr.getvalue()
+
+
+def warm_up(batch_size: int, min_iterations: int, max_iterations: int, tolerance: float) -> Dict:
+    """Run detect_batch at ``batch_size`` until its latency settles.
+
+    Latency counts as stable once the slowest call of the last
+    ``min_iterations`` runs is within ``tolerance`` of the slowest call of
+    the window before it.
+    """
+    batch = [Frame(warmup_frame())] * batch_size
+    timings: List[float] = []
+    stable = False
+    while len(timings) < max_iterations:
+        started = time.perf_counter()
+        detect_batch(batch)
+        timings.append((time.perf_counter() - started) * 1000)
+        if len(timings) >= 2 * min_iterations:
+            last = max(timings[-min_iterations:])
+            previous = max(timings[-2 * min_iterations:-min_iterations])
+            if abs(last - previous) <= tolerance * previous:
+                stable = True
+                break
+    return {
+        "batch_size": batch_size,
+        "iterations": len(timings),
+        "stable": stable,
+        "first_ms": timings[0],
+        "last_ms": timings[-1],
+    }
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from . import detector
+
+UTILISATION_WINDOW_S = 60.0
+
+
+def _timed_call(fn: Callable, *args) -> tuple:
+    """Runs inside the worker; returns the result together with the busy time."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _cpu_sets(workers: int) -> List[set]:
+    """Split the CPUs this process may run on into one disjoint set per worker."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cpus) // workers)
+    return [set(cpus[(i * per_worker) % len(cpus):][:per_worker]) for i in range(workers)]
+
+
+class InferenceExecutor:
+    """Runs blocking decode/inference work away from the asyncio event loop.
+
+    ``mode="thread"`` uses a thread pool, ``mode="process"`` a process pool
+    where every worker loads its own model copy and (optionally) is pinned to
+    its own slice of CPU cores. In both modes each worker owns one model.
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 1, pin_cpus: bool = True):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.pin_cpus = pin_cpus
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+        self._completed = 0
+        self._busy: deque = deque()  # (finished_at, busy_seconds)
+        self._started_at = 0.0
+
+    def start(self, model_path: str):
+        if self._pool is not None:
+            return
+        if self.mode == "process":
+            ctx = multiprocessing.get_context("spawn")
+            cpu_queue = None
+            if self.pin_cpus:
+                cpu_queue = ctx.SimpleQueue()
+                for cpus in _cpu_sets(self.workers):
+                    cpu_queue.put(cpus)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=detector.init_worker,
+                initargs=(model_path, cpu_queue),
+            )
+        else:
+            detector.set_torch_threads(max(1, (os.cpu_count() or 1) // self.workers))
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="inference",
+                initializer=detector.init_worker,
+                initargs=(model_path,),
+            )
+        self._started_at = time.monotonic()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on a worker and await its result.
+
+        In process mode ``fn`` and its arguments must be picklable.
+        """
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running")
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            result, busy = await loop.run_in_executor(self._pool, _timed_call, fn, *args)
+        finally:
+            self._pending -= 1
+        self._completed += 1
+        self._busy.append((time.monotonic(), busy))
+        return result
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        while self._busy and self._busy[0][0] < now - UTILISATION_WINDOW_S:
+            self._busy.popleft()
+        window = min(UTILISATION_WINDOW_S, max(now - self._started_at, 1e-9))
+        busy = sum(b for _, b in self._busy)
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "utilisation": min(1.0, busy / (self.workers * window)) if self._pool is not None else 0.0,
+            "utilisation_window_s": window,
+        }
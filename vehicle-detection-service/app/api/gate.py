@@ -0,0 +1,76 @@
+import io
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .cache import ResultCache
+from .config import GATE_SIZE
+from .models import DetectionResponse
+from .preprocess import crop_box
+
+
+def frame_signature(
+    image_bytes: bytes, crop: Optional[Tuple[float, float, float, float]] = None, size: int = GATE_SIZE
+) -> np.ndarray:
+    """Small grayscale thumbnail of a frame (or of its normalised ``crop``) to compare frames by.
+
+    JPEGs are decoded in grayscale at the smallest DCT scale that still
+    covers ``size`` pixels, so this costs a fraction of a full decode.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    left, top, right, bottom = crop_box(crop, width, height)
+    if image.format == "JPEG":
+        image.draft("L", (math.ceil(size * width / (right - left)), math.ceil(size * height / (bottom - top))))
+    image = image.convert("L")
+    kx, ky = image.width / width, image.height / height
+    box = (left * kx, top * ky, right * kx, bottom * ky)
+    return np.asarray(image.resize((size, size), Image.BOX, box=box), dtype=np.int16)
+
+
+class FrameGate:
+    """Per-camera check whether a frame changed enough to be worth detecting.
+
+    Each camera's signature is compared with that of its last *detected*
+    frame, so slow changes (dusk, a queue building up) add up until they
+    trigger inference. A frame counts as unchanged when at most
+    ``changed_fraction`` of the thumbnail pixels differ by more than
+    ``pixel_delta`` grey levels. Detected frames older than ``max_carry_s``
+    are not carried over any more.
+    """
+
+    def __init__(self, enabled: bool, pixel_delta: int, changed_fraction: float, max_carry_s: float,
+                 max_cameras: int):
+        self.enabled = enabled
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+        # camera id -> (request options, signature, response) of its last detected frame
+        self._last = ResultCache(capacity=max_cameras, ttl_s=max_carry_s)
+        self.checked = 0
+        self.skipped = 0
+
+    def check(self, camera_id: str, options: bytes, signature: np.ndarray) -> Optional[DetectionResponse]:
+        """The camera's previous response flagged ``carriedOver``, or None if inference should run."""
+        self.checked += 1
+        last = self._last.get(camera_id)
+        if last is None or last[0] != options or last[1].shape != signature.shape:
+            return None
+        changed = np.count_nonzero(np.abs(signature - last[1]) > self.pixel_delta)
+        if changed > self.changed_fraction * signature.size:
+            return None
+        self.skipped += 1
+        return last[2].model_copy(update={"carriedOver": True})
+
+    def update(self, camera_id: str, options: bytes, signature: np.ndarray, response: DetectionResponse):
+        self._last.put(camera_id, (options, signature, response))
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "cameras": self._last.stats()["size"],
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+        }
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from . import detector
+from .config import WARMUP_BATCH_SIZES, WARMUP_MAX_ITERATIONS, WARMUP_MIN_ITERATIONS, WARMUP_TOLERANCE
+from .executor import InferenceExecutor
+
+
+class ServiceState:
+    """Liveness/readiness of the detection service.
+
+    The service is live as soon as it accepts requests, and ready once every
+    inference worker has loaded its model and finished warming up.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.warmup: List[Dict] = []
+        self.error: Optional[str] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "uptime_s": time.time() - self.started_at,
+            "warmup_s": self.ready_at - self.started_at if self.ready_at else None,
+            "warmup": self.warmup,
+            "error": self.error,
+        }
+
+
+state = ServiceState()
+
+
+async def load_models(executor: InferenceExecutor):
+    """Make every worker load its model now instead of on its first request."""
+    await asyncio.gather(*[executor.run(detector.load_model) for _ in range(executor.workers)])
+
+
+async def warm_up(
+    executor: InferenceExecutor,
+    batch_sizes: List[int] = WARMUP_BATCH_SIZES,
+    min_iterations: int = WARMUP_MIN_ITERATIONS,
+    max_iterations: int = WARMUP_MAX_ITERATIONS,
+    tolerance: float = WARMUP_TOLERANCE,
+):
+    """Warm every worker up at the production batch sizes, then mark the service ready.
+
+    Each batch size is submitted once per worker concurrently, so all
+    workers go through lazy operator initialisation before real traffic
+    arrives.
+    """
+    try:
+        for batch_size in batch_sizes:
+            state.warmup += await asyncio.gather(*[
+                executor.run(detector.warm_up, batch_size, min_iterations, max_iterations, tolerance)
+                for _ in range(executor.workers)
+            ])
+        state.ready = True
+        state.ready_at = time.time()
+        print(f"Warm-up finished in {state.ready_at - state.started_at:.1f}s, service ready")
+    except Exception as e:
+        state.error = f"Warm-up failed: {e}"
+        print(state.error)
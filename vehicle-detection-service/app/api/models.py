@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
 
 class Detection(BaseModel):
     label: str
@@ -16,4 +16,24 @@ class DetectionResponse(BaseModel):
     numberOfTruck: int = 0
     numberOfBus: int = 0
     numberOfFireTruck: int = 0
-    numberOfContainer: int = 0
\ No newline at end of file
+    numberOfContainer: int = 0
+    carriedOver: bool = False  # frame barely changed, these are the camera's previous results
+
+class TrackingResponse(DetectionResponse):
+    cameraId: str
+    trackIds: List[int]  # track of each entry in detections, -1 for untracked low-confidence ones
+    newTrackIds: List[int]  # tracks counted for the first time on this frame
+    newVehicles: Dict[str, int]  # numberOf* counts of newly counted vehicles
+    activeTracks: int
+
+class BatchDetectionResponse(BaseModel):
+    results: Dict[str, DetectionResponse]
+    errors: Dict[str, str] = {}
+
+class EncodedImage(BaseModel):
+    media_type: str = "image/jpeg"
+    image: str  # base64
+
+class AnnotatedDetectionResponse(BaseModel):
+    detection: DetectionResponse
+    annotated: EncodedImage
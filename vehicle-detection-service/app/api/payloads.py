@@ -0,0 +1,80 @@
+import struct
+from typing import Iterable, List, Tuple
+from uuid import uuid4
+
+# Length-prefixed frame stream used by /detect-vehicles/batch:
+#   [u16 id length][id, utf-8][u32 image length][image bytes], repeated.
+# All integers are big-endian.
+_ID_LEN = struct.Struct(">H")
+_IMAGE_LEN = struct.Struct(">I")
+
+
+def pack_frames(frames: Iterable[Tuple[str, bytes]]) -> bytes:
+    chunks = []
+    for frame_id, image in frames:
+        encoded_id = frame_id.encode("utf-8")
+        chunks += [_ID_LEN.pack(len(encoded_id)), encoded_id, _IMAGE_LEN.pack(len(image)), image]
+    return b"".join(chunks)
+
+
+def unpack_frames(body: bytes) -> List[Tuple[str, bytes]]:
+    """Split a length-prefixed stream into (id, image bytes) pairs.
+
+    Raises:
+        ValueError: If the stream is truncated.
+    """
+    frames = []
+    view = memoryview(body)
+    offset = 0
+    while offset < len(view):
+        if offset + _ID_LEN.size > len(view):
+            raise ValueError("Truncated frame header")
+        (id_len,) = _ID_LEN.unpack_from(view, offset)
+        offset += _ID_LEN.size
+        if offset + id_len + _IMAGE_LEN.size > len(view):
+            raise ValueError("Truncated frame id")
+        frame_id = bytes(view[offset:offset + id_len]).decode("utf-8")
+        offset += id_len
+        (image_len,) = _IMAGE_LEN.unpack_from(view, offset)
+        offset += _IMAGE_LEN.size
+        if offset + image_len > len(view):
+            raise ValueError(f"Truncated image for frame {frame_id}")
+        frames.append((frame_id, bytes(view[offset:offset + image_len])))
+        offset += image_len
+    return frames
+
+
+def unpack_stream_frame(message: bytes) -> Tuple[str, bytes]:
+    """Split one binary WebSocket message, ``[u16 id length][id, utf-8][image bytes]``,
+    into (camera id, image bytes). The image runs to the end of the message.
+
+    Raises:
+        ValueError: If the message is shorter than its camera id.
+    """
+    if len(message) < _ID_LEN.size:
+        raise ValueError("Truncated frame header")
+    (id_len,) = _ID_LEN.unpack_from(message)
+    if _ID_LEN.size + id_len > len(message):
+        raise ValueError("Truncated camera id")
+    camera_id = message[_ID_LEN.size:_ID_LEN.size + id_len].decode("utf-8")
+    return camera_id, message[_ID_LEN.size + id_len:]
+
+
+def build_multipart(parts: Iterable[Tuple[str, str, bytes]]) -> Tuple[bytes, str]:
+    """Encode (name, content type, body) parts as a multipart/mixed body.
+
+    Returns:
+        Tuple[bytes, str]: The body and the matching Content-Type header value
+    """
+    boundary = uuid4().hex
+    chunks = []
+    for name, content_type, body in parts:
+        chunks.append(
+            f"--{boundary}\r\n"
+            f"Content-Disposition: inline; name=\"{name}\"\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+        )
+        chunks += [body, b"\r\n"]
+    chunks.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(chunks), f"multipart/mixed; boundary={boundary}"
@@ -0,0 +1,123 @@
+import io
+import math
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .config import BATCH_MAX_SIZE, MODEL_IMGSZ
+
+PAD_VALUE = 114  # same grey ultralytics pads with
+STRIDE = 32
+
+
+class Letterbox(NamedTuple):
+    """How a frame was mapped into the model input: input = (original - offset) * scale + pad."""
+    scale_x: float
+    scale_y: float
+    pad_x: int
+    pad_y: int
+    width: int   # original frame size
+    height: int
+    offset_x: int = 0  # top-left corner of the ROI crop, in original pixels
+    offset_y: int = 0
+
+
+def crop_box(crop: Optional[Tuple[float, float, float, float]], width: int, height: int) -> Tuple[int, int, int, int]:
+    """Pixel (left, top, right, bottom) of a normalised crop; the whole frame if ``crop`` is None."""
+    if crop is None:
+        return 0, 0, width, height
+    left, top = min(math.floor(crop[0] * width), width - 1), min(math.floor(crop[1] * height), height - 1)
+    right, bottom = math.ceil(crop[2] * width), math.ceil(crop[3] * height)
+    return left, top, max(right, left + 1), max(bottom, top + 1)
+
+
+_local = threading.local()
+
+
+def input_buffers(count: int, size: int = MODEL_IMGSZ) -> np.ndarray:
+    """Reusable (count, size, size, 3) uint8 slots for this thread's next batch.
+
+    The buffer is allocated once per worker thread and only grows when a
+    batch larger than BATCH_MAX_SIZE comes along.
+    """
+    buf = getattr(_local, "buffer", None)
+    if buf is None or buf.shape[0] < count or buf.shape[1] != size:
+        buf = _local.buffer = np.empty((max(count, BATCH_MAX_SIZE), size, size, 3), dtype=np.uint8)
+    return buf[:count]
+
+
+def decode_letterboxed(
+    image_bytes: bytes, out: np.ndarray, crop: Optional[Tuple[float, float, float, float]] = None
+) -> tuple:
+    """Decode a frame directly at (or near) model resolution and letterbox it.
+
+    JPEGs are decoded with DCT scaling (``Image.draft``), which skips most of
+    the work of decoding a full-resolution frame that is downscaled right
+    after. The frame (or the normalised ``crop`` of it) is resized to fit
+    ``out`` (a square, BGR, uint8 slot), centred, and padded to a multiple
+    of the model stride.
+
+    Returns:
+        Tuple[np.ndarray, Letterbox]: A view of ``out`` holding the model
+        input, and the mapping needed to project boxes back onto the
+        original frame
+    """
+    size = out.shape[0]
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    left, top, right, bottom = crop_box(crop, width, height)
+    crop_w, crop_h = right - left, bottom - top
+    ratio = min(size / crop_w, size / crop_h)
+    if image.format == "JPEG":
+        image.draft("RGB", (math.ceil(width * ratio), math.ceil(height * ratio)))
+    image = image.convert("RGB")
+    if crop is not None:
+        # The crop box is in original pixels, the drafted image may be reduced
+        kx, ky = image.width / width, image.height / height
+        image = image.crop((round(left * kx), round(top * ky), round(right * kx), round(bottom * ky)))
+
+    # draft() only reduces by powers of two; letterbox_into finishes the resize
+    return letterbox_into(np.asarray(image), out, (left, top, right, bottom), width, height)
+
+
+def letterbox_into(pixels: np.ndarray, out: np.ndarray, region: Tuple[int, int, int, int], width: int, height: int) -> tuple:
+    """Resize RGB ``pixels`` of a frame region to fit ``out`` and letterbox them.
+
+    Args:
+        pixels (np.ndarray): RGB pixels of ``region``, at any resolution
+        out (np.ndarray): Square BGR uint8 slot to write into
+        region (Tuple[int, int, int, int]): (left, top, right, bottom) of the
+            region in original frame pixels
+        width (int), height (int): Original frame size
+
+    Returns:
+        Tuple[np.ndarray, Letterbox]: A stride-aligned view of ``out`` and
+        the mapping back to original frame coordinates
+    """
+    size = out.shape[0]
+    left, top, right, bottom = region
+    region_w, region_h = right - left, bottom - top
+    ratio = min(size / region_w, size / region_h)
+    new_w, new_h = max(1, round(region_w * ratio)), max(1, round(region_h * ratio))
+    if pixels.shape[1] != new_w or pixels.shape[0] != new_h:
+        pixels = cv2.resize(pixels, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas_w = min(size, math.ceil(new_w / STRIDE) * STRIDE)
+    canvas_h = min(size, math.ceil(new_h / STRIDE) * STRIDE)
+    pad_x, pad_y = (canvas_w - new_w) // 2, (canvas_h - new_h) // 2
+    canvas = out[:canvas_h, :canvas_w]
+    canvas.fill(PAD_VALUE)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = pixels[..., ::-1]  # RGB -> BGR
+    return canvas, Letterbox(new_w / region_w, new_h / region_h, pad_x, pad_y, width, height, left, top)
+
+
+def unletterbox(boxes: np.ndarray, letterbox: Letterbox) -> np.ndarray:
+    """Project (N, 4) xyxy boxes from model input coordinates back onto the original frame."""
+    pad = np.array([letterbox.pad_x, letterbox.pad_y] * 2, dtype=np.float32)
+    scale = np.array([letterbox.scale_x, letterbox.scale_y] * 2, dtype=np.float32)
+    offset = np.array([letterbox.offset_x, letterbox.offset_y] * 2, dtype=np.float32)
+    limit = np.array([letterbox.width, letterbox.height] * 2, dtype=np.float32)
+    return np.clip((boxes - pad) / scale + offset, 0, limit)
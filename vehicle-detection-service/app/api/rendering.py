@@ -0,0 +1,86 @@
+import io
+import math
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .config import JPEG_QUALITY
+from .detector import label_index, vehicle_classes
+from .models import DetectionResponse
+
+# BGR colour of each entry of vehicle_classes
+COLOURS = [(0, 200, 255), (255, 128, 0), (0, 0, 255), (255, 0, 255),
+           (0, 128, 255), (0, 255, 0), (0, 0, 128), (255, 255, 0)]
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+MIN_LABEL_SIZE = 320  # no labels on thumbnails smaller than this, they would cover the boxes
+
+
+class RenderOptions(NamedTuple):
+    """How annotated frames are encoded."""
+    quality: int = JPEG_QUALITY
+    max_size: Optional[int] = None  # longest side of the output in pixels, None keeps the frame size
+
+
+def decode_for_render(image_bytes: bytes, max_size: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """Decode a frame to BGR pixels at the output size.
+
+    JPEGs that are rendered as thumbnails are decoded at reduced resolution
+    (``Image.draft``) rather than decoded in full and shrunk afterwards.
+
+    Returns:
+        Tuple[np.ndarray, float]: The pixels and their scale relative to the original frame
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    scale = min(1.0, max_size / max(width, height)) if max_size else 1.0
+    out_w, out_h = max(1, round(width * scale)), max(1, round(height * scale))
+    if scale < 1 and image.format == "JPEG":
+        image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+    pixels = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    if pixels.shape[1] != out_w or pixels.shape[0] != out_h:
+        pixels = cv2.resize(pixels, (out_w, out_h), interpolation=cv2.INTER_AREA)
+    return pixels, scale
+
+
+def draw_detections(canvas: np.ndarray, idx: np.ndarray, xyxy: np.ndarray):
+    """Draw (N, 4) xyxy boxes of class indices ``idx`` onto ``canvas`` in place.
+
+    All boxes of a class go to OpenCV as one polyline call.
+    """
+    if not len(idx):
+        return
+    thickness = max(1, round(max(canvas.shape[:2]) / 400))
+    x1, y1, x2, y2 = np.rint(xyxy).astype(np.int32).T
+    rects = np.stack([np.stack(corner, axis=1) for corner in ((x1, y1), (x2, y1), (x2, y2), (x1, y2))], axis=1)
+    for c in np.unique(idx).tolist():
+        cv2.polylines(canvas, list(rects[idx == c]), True, COLOURS[c], thickness)
+    if max(canvas.shape[:2]) < MIN_LABEL_SIZE:
+        return
+    font_scale = 0.4 * thickness
+    for c, x, y in zip(idx.tolist(), x1.tolist(), y1.tolist()):
+        cv2.putText(canvas, vehicle_classes[c], (x, max(y - 3 * thickness, 10)), FONT, font_scale,
+                    COLOURS[c], thickness, cv2.LINE_AA)
+
+
+def render_detections(image_bytes: bytes, response: DetectionResponse, options: RenderOptions = RenderOptions()) -> bytes:
+    """Draw the detections of ``response`` on its frame and encode it as JPEG.
+
+    Args:
+        image_bytes (bytes): The encoded frame the detections came from
+        response (DetectionResponse): Detections in original frame coordinates
+        options (RenderOptions): JPEG quality and output size
+
+    Returns:
+        bytes: The annotated frame, JPEG encoded
+    """
+    canvas, scale = decode_for_render(image_bytes, options.max_size)
+    detected = response.detections
+    idx = np.array([label_index[d.label] for d in detected], dtype=np.int64)
+    xyxy = np.array([d.bbox for d in detected], dtype=np.float32).reshape(-1, 4) * scale
+    draw_detections(canvas, idx, xyxy)
+    ok, encoded = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, options.quality])
+    if not ok:
+        raise ValueError("Could not encode the annotated frame")
+    return encoded.tobytes()
@@ -0,0 +1,51 @@
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Region of interest: polygon of (x, y) points normalised to [0, 1] by the
+# frame width/height, so it stays valid if a camera changes resolution.
+Polygon = Tuple[Tuple[float, float], ...]
+
+
+def parse_roi(raw: Optional[str]) -> Optional[Polygon]:
+    """Parse a JSON ``[[x, y], ...]`` polygon; empty input means no ROI.
+
+    Raises:
+        ValueError: If the polygon is malformed.
+    """
+    if not raw:
+        return None
+    points = json.loads(raw)
+    if not isinstance(points, list) or len(points) < 3:
+        raise ValueError("ROI must be a list of at least 3 [x, y] points")
+    polygon = []
+    for point in points:
+        if not isinstance(point, (list, tuple)) or len(point) != 2:
+            raise ValueError("ROI points must be [x, y] pairs")
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in point):
+            raise ValueError("ROI coordinates must be numbers")
+        x, y = float(point[0]), float(point[1])
+        if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+            raise ValueError("ROI coordinates must be normalised to [0, 1]")
+        polygon.append((x, y))
+    return tuple(polygon)
+
+
+def roi_bounds(polygon: Polygon) -> Tuple[float, float, float, float]:
+    """Normalised (x0, y0, x1, y1) bounding box of the polygon."""
+    xs, ys = zip(*polygon)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting for (N, 2) points against an (M, 2) polygon, vectorised over both."""
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+    x, y = points[:, 0:1], points[:, 1:2]              # (N, 1)
+    x1, y1 = polygon[:, 0], polygon[:, 1]              # (M,)
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    crosses = (y1 > y) != (y2 > y)                     # (N, M)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at_y = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (x < x_at_y), axis=1) % 2 == 1
@@ -0,0 +1,103 @@
+import io
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .config import MODEL_IMGSZ, SLICE_MAX_TILES, SLICE_MERGE_THRESHOLD
+from .preprocess import crop_box, letterbox_into
+
+
+class SliceConfig(NamedTuple):
+    """Sliced inference settings: square tiles of ``tile_size`` original pixels
+    overlapping by ``overlap`` (fraction of the tile), plus an optional
+    pass over the whole frame for vehicles larger than a tile."""
+    tile_size: int = 640
+    overlap: float = 0.2
+    full_frame: bool = True
+
+
+def check_slicing(tile_size: int, overlap: float):
+    """Reject settings that make no sense or would cut frames into a huge number of tiles.
+
+    Raises:
+        ValueError: If ``tile_size`` is not positive or ``overlap`` is outside [0, 1).
+    """
+    if tile_size <= 0:
+        raise ValueError(f"tile_size must be positive, got {tile_size}")
+    if not 0 <= overlap < 1:
+        raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+
+
+def _starts(start: int, end: int, tile: int, step: int) -> List[int]:
+    if end - start <= tile:
+        return [start]
+    starts = list(range(start, end - tile, step))
+    return starts + [end - tile]
+
+
+def tile_grid(region: Tuple[int, int, int, int], tile: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """Overlapping tiles covering ``region``; the last row/column is aligned to its edge."""
+    left, top, right, bottom = region
+    step = max(1, int(tile * (1 - overlap)))
+    return [
+        (x, y, min(x + tile, right), min(y + tile, bottom))
+        for y in _starts(top, bottom, tile, step)
+        for x in _starts(left, right, tile, step)
+    ]
+
+
+def slice_frame(
+    image_bytes: bytes, crop: Optional[Tuple[float, float, float, float]], config: SliceConfig, size: int = MODEL_IMGSZ
+) -> list:
+    """Decode a frame at full resolution and cut it into letterboxed model inputs.
+
+    Returns:
+        List[Tuple[np.ndarray, Letterbox]]: One input per tile (plus the whole
+        region first when ``config.full_frame``), each with the mapping back
+        to original frame coordinates
+
+    Raises:
+        ValueError: If the frame needs more than SLICE_MAX_TILES tiles.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    region = crop_box(crop, width, height)
+    tiles = tile_grid(region, config.tile_size, config.overlap)
+    if len(tiles) > SLICE_MAX_TILES:
+        raise ValueError(f"Slicing a {width}x{height} frame into {config.tile_size}px tiles with "
+                         f"overlap {config.overlap} needs {len(tiles)} tiles, more than {SLICE_MAX_TILES}")
+    pixels = np.asarray(image.convert("RGB"))
+    regions = ([region] if config.full_frame and tiles != [region] else []) + tiles
+    slots = np.empty((len(regions), size, size, 3), dtype=np.uint8)
+    return [
+        letterbox_into(pixels[y0:y1, x0:x1], slot, (x0, y0, x1, y1), width, height)
+        for (x0, y0, x1, y1), slot in zip(regions, slots)
+    ]
+
+
+def merge_detections(idx: np.ndarray, conf: np.ndarray, xyxy: np.ndarray,
+                     threshold: float = SLICE_MERGE_THRESHOLD) -> np.ndarray:
+    """Cross-tile NMS: indices of the detections to keep.
+
+    Greedy and class-aware, like regular NMS, but overlap is measured as
+    intersection over the *smaller* box. A vehicle cut by a tile border shows
+    up as a partial box inside the full one, which plain IoU would keep.
+    """
+    order = np.argsort(-conf)
+    areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    suppressed = np.zeros(len(conf), dtype=bool)
+    keep = []
+    for pos, i in enumerate(order):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        rest = order[pos + 1:]
+        rest = rest[~suppressed[rest] & (idx[rest] == idx[i])]
+        if not len(rest):
+            continue
+        w = np.clip(np.minimum(xyxy[i, 2], xyxy[rest, 2]) - np.maximum(xyxy[i, 0], xyxy[rest, 0]), 0, None)
+        h = np.clip(np.minimum(xyxy[i, 3], xyxy[rest, 3]) - np.maximum(xyxy[i, 1], xyxy[rest, 1]), 0, None)
+        ios = w * h / np.maximum(np.minimum(areas[i], areas[rest]), 1e-6)
+        suppressed[rest[ios > threshold]] = True
+    return np.asarray(keep, dtype=np.int64)
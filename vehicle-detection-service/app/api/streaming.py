@@ -0,0 +1,181 @@
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .camera_profiles import slicing_for
+from .detector import COUNT_FIELDS, Frame, label_index, vehicle_classes
+from .models import DetectionResponse
+from .payloads import unpack_stream_frame
+
+
+class StreamStats:
+    """Counters across all streaming connections."""
+
+    def __init__(self):
+        self.connections = 0
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def stats(self) -> Dict:
+        return {
+            "connections": self.connections,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+stream_stats = StreamStats()
+
+
+class LatestFrames:
+    """Frames of one connection waiting for inference, at most one per camera.
+
+    A frame that arrives while an older frame of the same camera is still
+    waiting replaces it, so a client that sends faster than inference keeps
+    getting results for its newest frames instead of an ever-growing
+    backlog. Each camera has at most one frame in inference at a time, so
+    its results come back in order.
+    """
+
+    def __init__(self):
+        self._pending: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()  # camera -> (seq, image)
+        self._busy = set()
+        self._seq: Dict[str, int] = {}
+        self._dropped: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+
+    def put(self, camera_id: str, image: bytes) -> int:
+        """Queue a camera's frame; returns its sequence number within the connection."""
+        seq = self._seq.get(camera_id, 0) + 1
+        self._seq[camera_id] = seq
+        if camera_id in self._pending:
+            self._dropped[camera_id] = self._dropped.get(camera_id, 0) + 1
+            stream_stats.dropped += 1
+        # Replacing keeps the camera's place in line, so busy cameras can't starve quiet ones
+        self._pending[camera_id] = (seq, image)
+        self._changed.set()
+        return seq
+
+    async def take(self) -> Tuple[str, int, bytes, int]:
+        """Wait for the oldest waiting frame of a camera not already in inference.
+
+        Returns:
+            Tuple[str, int, bytes, int]: Camera id, sequence number, image
+            and the number of that camera's frames dropped since its last result
+        """
+        while True:
+            for camera_id in self._pending:
+                if camera_id not in self._busy:
+                    seq, image = self._pending.pop(camera_id)
+                    self._busy.add(camera_id)
+                    return camera_id, seq, image, self._dropped.pop(camera_id, 0)
+            self._changed.clear()
+            await self._changed.wait()
+
+    def done(self, camera_id: str):
+        self._busy.discard(camera_id)
+        self._changed.set()
+
+
+def encode_result(camera_id: str, seq: int, dropped: int, response: DetectionResponse, boxes: bool) -> str:
+    """Compact JSON message for one result.
+
+    ``n`` holds the counts in ``vehicle_classes`` order and each entry of
+    ``b`` is ``[class index, confidence, x1, y1, x2, y2]`` in whole pixels.
+    """
+    message = {
+        "c": camera_id,
+        "s": seq,
+        "d": dropped,
+        "t": response.detect_at,
+        "n": [getattr(response, field) for field in COUNT_FIELDS],
+    }
+    if boxes:
+        message["b"] = [
+            [label_index[d.label], round(d.confidence, 2), *(round(v) for v in d.bbox)]
+            for d in response.detections
+        ]
+    return json.dumps(message, separators=(",", ":"))
+
+
+async def serve_stream(
+    websocket: WebSocket,
+    detect: Callable[[Frame], Awaitable[DetectionResponse]],
+    max_in_flight: int,
+    boxes: bool = True,
+):
+    """Run one streaming connection until the client disconnects.
+
+    Incoming binary messages are ``[u16 camera id length][camera id][JPEG]``
+    (see payloads.py). Results are sent back as text messages built by
+    ``encode_result`` as soon as each frame is done, in whatever order the
+    cameras finish.
+    """
+    await websocket.accept()
+    stream_stats.connections += 1
+    send_lock = asyncio.Lock()
+
+    async def send(text: str):
+        async with send_lock:
+            await websocket.send_text(text)
+
+    frames = LatestFrames()
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async def run_one(camera_id: str, seq: int, image: bytes, dropped: int):
+        try:
+            response = await detect(Frame(image, slicing=slicing_for(camera_id), camera_id=camera_id))
+            stream_stats.processed += 1
+            text = encode_result(camera_id, seq, dropped, response, boxes)
+        except Exception as e:
+            stream_stats.errors += 1
+            text = json.dumps({"c": camera_id, "s": seq, "d": dropped, "e": str(e)}, separators=(",", ":"))
+        finally:
+            frames.done(camera_id)
+            slots.release()
+        try:
+            await send(text)
+        except Exception:
+            pass  # the client is gone; the receive loop ends the connection
+
+    async def dispatch():
+        running = set()
+        try:
+            while True:
+                await slots.acquire()
+                task = asyncio.create_task(run_one(*await frames.take()))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            for task in running:
+                task.cancel()
+
+    dispatcher = asyncio.create_task(dispatch())
+    try:
+        await send(json.dumps({"classes": vehicle_classes}, separators=(",", ":")))
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is None:
+                await send(json.dumps({"e": "Expected a binary frame message"}, separators=(",", ":")))
+                continue
+            try:
+                camera_id, image = unpack_stream_frame(message["bytes"])
+            except (ValueError, UnicodeDecodeError) as e:
+                await send(json.dumps({"e": f"Invalid frame message: {e}"}, separators=(",", ":")))
+                continue
+            stream_stats.received += 1
+            frames.put(camera_id, image)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        dispatcher.cancel()
+        stream_stats.connections -= 1
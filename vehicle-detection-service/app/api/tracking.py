@@ -0,0 +1,195 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def greedy_match(iou: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Match rows to columns by descending IoU; returns matched (rows, cols)."""
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols])
+    used_rows, used_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.asarray(matched_rows, dtype=np.int64), np.asarray(matched_cols, dtype=np.int64)
+
+
+class TrackUpdate(NamedTuple):
+    track_ids: List[int]   # per detection, -1 if it was not assigned to a track
+    new_ids: List[int]     # tracks counted for the first time on this frame
+    new_counts: np.ndarray  # per class index, number of newly counted tracks
+    active: int
+
+
+class CameraTracks:
+    """Live tracks of one camera as parallel arrays, one row per track."""
+
+    def __init__(self):
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.labels = np.empty(0, dtype=np.int64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.last_seen = np.empty(0, dtype=np.float64)
+        self.misses = np.empty(0, dtype=np.int32)  # consecutive frames without a match
+        self.counted = np.empty(0, dtype=bool)
+        self.next_id = 1
+        self.updated_at = 0.0
+
+    def keep(self, mask: np.ndarray):
+        self.boxes, self.labels, self.ids = self.boxes[mask], self.labels[mask], self.ids[mask]
+        self.hits, self.last_seen, self.counted = self.hits[mask], self.last_seen[mask], self.counted[mask]
+        self.misses = self.misses[mask]
+
+    def add(self, labels: np.ndarray, boxes: np.ndarray, now: float):
+        count = len(labels)
+        self.boxes = np.concatenate([self.boxes, boxes.astype(np.float32)])
+        self.labels = np.concatenate([self.labels, labels])
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count)])
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int32)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(count, now)])
+        self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int32)])
+        self.counted = np.concatenate([self.counted, np.zeros(count, dtype=bool)])
+        self.next_id += count
+
+
+class Tracker:
+    """ByteTrack-style IoU tracker, one set of tracks per camera.
+
+    Detections above ``high_conf`` are matched to live tracks first; the
+    remaining tracks then get a second chance against the low-confidence
+    detections, which keeps partly occluded vehicles on their track. Only
+    unmatched high-confidence detections start new tracks. A track is
+    counted once, when it reaches ``min_hits`` matched frames, so a car
+    waiting at a red light over several polls is counted a single time.
+
+    A track ends once it goes unmatched for more than ``max_missed``
+    frames, or for longer than ``max_age_s``. Otherwise a different vehicle
+    that later stops in the same spot would take over its id and never be
+    counted. Association by IoU only works while a vehicle's boxes overlap
+    from one frame to the next, i.e. at frame intervals of a few seconds.
+    Cameras that stop sending frames are evicted too (and the least
+    recently updated ones beyond ``max_cameras``).
+    """
+
+    def __init__(self, iou_threshold: float, high_conf: float, min_hits: int, max_age_s: float, max_cameras: int,
+                 max_missed: int = 0):
+        self.iou_threshold = iou_threshold
+        self.high_conf = high_conf
+        self.min_hits = max(1, min_hits)
+        self.max_age_s = max_age_s
+        self.max_missed = max(0, max_missed)
+        self.max_cameras = max(1, max_cameras)
+        self._cameras: "OrderedDict[str, CameraTracks]" = OrderedDict()
+        self.frames = 0
+        self.counted = 0
+        self.evicted_tracks = 0
+        self.evicted_cameras = 0
+
+    def update(self, camera_id: str, labels: np.ndarray, conf: np.ndarray, boxes: np.ndarray,
+               num_classes: int, now: Optional[float] = None) -> TrackUpdate:
+        """Advance the camera's tracks by one frame of detections.
+
+        Args:
+            camera_id (str): Camera the frame belongs to
+            labels (np.ndarray): (N,) class index of each detection
+            conf (np.ndarray): (N,) confidence of each detection
+            boxes (np.ndarray): (N, 4) xyxy boxes in frame pixels
+            num_classes (int): Length of the returned ``new_counts``
+            now (float): Frame time in seconds, ``time.monotonic()`` by default
+
+        Returns:
+            TrackUpdate: Track id of every detection and the vehicles counted for the first time
+        """
+        now = time.monotonic() if now is None else now
+        tracks = self._cameras.pop(camera_id, None) or CameraTracks()
+        self._cameras[camera_id] = tracks  # most recently updated last
+        tracks.updated_at = now
+        self._evict_cameras(now)
+        self.frames += 1
+
+        live = now - tracks.last_seen <= self.max_age_s
+        self.evicted_tracks += int((~live).sum())
+        tracks.keep(live)
+
+        det_track = np.full(len(labels), -1, dtype=np.int64)  # row in tracks per detection
+        free_tracks = np.arange(len(tracks.ids))
+        for stage in (conf >= self.high_conf, conf < self.high_conf):
+            dets = np.nonzero(stage)[0]
+            if not len(dets) or not len(free_tracks):
+                continue
+            rows, cols = greedy_match(iou_matrix(tracks.boxes[free_tracks], boxes[dets]), self.iou_threshold)
+            det_track[dets[cols]] = free_tracks[rows]
+            free_tracks = np.delete(free_tracks, rows)
+
+        matched = det_track >= 0
+        rows = det_track[matched]
+        tracks.boxes[rows] = boxes[matched]
+        tracks.labels[rows] = labels[matched]
+        tracks.hits[rows] += 1
+        tracks.last_seen[rows] = now
+        tracks.misses += 1
+        tracks.misses[rows] = 0
+        # Tracks that missed too many frames end here, before new ones are added
+        ended = tracks.misses > self.max_missed
+        if ended.any():
+            self.evicted_tracks += int(ended.sum())
+            kept = np.nonzero(~ended)[0]
+            remap = np.full(len(ended), -1, dtype=np.int64)
+            remap[kept] = np.arange(len(kept))
+            det_track[matched] = remap[rows]
+            tracks.keep(~ended)
+
+        first = len(tracks.ids)
+        new = np.nonzero(~matched & (conf >= self.high_conf))[0]
+        tracks.add(labels[new], boxes[new], now)
+        det_track[new] = np.arange(first, first + len(new))
+
+        confirmed = ~tracks.counted & (tracks.hits >= self.min_hits)
+        tracks.counted |= confirmed
+        self.counted += int(confirmed.sum())
+
+        assigned = det_track >= 0
+        track_ids = np.full(len(labels), -1, dtype=np.int64)
+        track_ids[assigned] = tracks.ids[det_track[assigned]]
+        return TrackUpdate(
+            track_ids=track_ids.tolist(),
+            new_ids=tracks.ids[confirmed].tolist(),
+            new_counts=np.bincount(tracks.labels[confirmed], minlength=num_classes),
+            active=len(tracks.ids),
+        )
+
+    def _evict_cameras(self, now: float):
+        while self._cameras:
+            camera_id, tracks = next(iter(self._cameras.items()))
+            if len(self._cameras) <= self.max_cameras and now - tracks.updated_at <= self.max_age_s:
+                break
+            del self._cameras[camera_id]
+            self.evicted_cameras += 1
+            self.evicted_tracks += len(tracks.ids)
+
+    def stats(self) -> Dict:
+        return {
+            "cameras": len(self._cameras),
+            "active_tracks": sum(len(t.ids) for t in self._cameras.values()),
+            "frames": self.frames,
+            "counted": self.counted,
+            "evicted_tracks": self.evicted_tracks,
+            "evicted_cameras": self.evicted_cameras,
+        }
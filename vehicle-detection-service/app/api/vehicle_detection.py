@@ -1,97 +1,357 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
-from ultralytics import YOLO
-from PIL import Image, ImageDraw
-import io
-from datetime import datetime
-from .models import Detection, DetectionResponse
-import torch
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, WebSocket
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import UploadFile as FormFile
+import asyncio
+import base64
+import numpy as np
+from typing import Literal, Optional, Tuple
+from .batcher import InferenceBatcher
+from .cache import ResultCache, frame_hash
+from .camera_profiles import slicing_for
+from .config import (ANNOTATED_CACHE_CAPACITY, ANNOTATED_CACHE_TTL_S, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+                     BATCH_REQUEST_MAX_FRAMES, GATE_CHANGED_FRACTION, GATE_ENABLED, GATE_MAX_CAMERAS,
+                     GATE_MAX_CARRY_S, GATE_PIXEL_DELTA, INFERENCE_EXECUTOR, INFERENCE_PIN_CPUS, INFERENCE_WORKERS,
+                     JPEG_QUALITY, RESULT_CACHE_CAPACITY, RESULT_CACHE_TTL_S, STREAM_MAX_IN_FLIGHT,
+                     TRACK_HIGH_CONF, TRACK_IOU_THRESHOLD, TRACK_MAX_AGE_S, TRACK_MAX_CAMERAS, TRACK_MAX_MISSED,
+                     TRACK_MIN_HITS)
+from .detector import COUNT_FIELDS, Frame, detect_batch, label_index, vehicle_classes
+from .executor import InferenceExecutor
+from .gate import FrameGate, frame_signature
+from .lifecycle import state
+from .models import (AnnotatedDetectionResponse, BatchDetectionResponse, DetectionResponse, EncodedImage,
+                     TrackingResponse)
+from .payloads import build_multipart, unpack_frames
+from .rendering import RenderOptions, render_detections
+from .roi import parse_roi, roi_bounds
+from .streaming import serve_stream, stream_stats
+from .tracking import Tracker
 
 detections = APIRouter()
 
-model = YOLO("yolov10n.pt", task='detect')  # Load the YOLOv8 model
-vehicle_classes = ['bicycle', 'motorcycle', 'car', 'van', 'truck', 'bus', 'fire truck', 'container']
+executor = InferenceExecutor(mode=INFERENCE_EXECUTOR, workers=INFERENCE_WORKERS, pin_cpus=INFERENCE_PIN_CPUS)
+
+
+async def run_detect_batch(frames: list) -> list:
+    return await executor.run(detect_batch, frames)
+
+batcher = InferenceBatcher(
+    run_detect_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_concurrency=INFERENCE_WORKERS,
+)
+
+# Cameras often serve the same JPEG (or an "offline" placeholder) for
+# several polls in a row; those frames skip inference entirely
+result_cache = ResultCache(capacity=RESULT_CACHE_CAPACITY, ttl_s=RESULT_CACHE_TTL_S)
+
+# Static scenes (night, empty roads) skip inference and reuse the camera's last results
+frame_gate = FrameGate(
+    enabled=GATE_ENABLED,
+    pixel_delta=GATE_PIXEL_DELTA,
+    changed_fraction=GATE_CHANGED_FRACTION,
+    max_carry_s=GATE_MAX_CARRY_S,
+    max_cameras=GATE_MAX_CAMERAS,
+)
+
+# Dashboards re-request the same frames; rendered JPEGs can be kept too
+annotated_cache = ResultCache(capacity=ANNOTATED_CACHE_CAPACITY, ttl_s=ANNOTATED_CACHE_TTL_S)
+
+# Track state lives in this process; workers only run detection
+tracker = Tracker(
+    iou_threshold=TRACK_IOU_THRESHOLD,
+    high_conf=TRACK_HIGH_CONF,
+    min_hits=TRACK_MIN_HITS,
+    max_age_s=TRACK_MAX_AGE_S,
+    max_missed=TRACK_MAX_MISSED,
+    max_cameras=TRACK_MAX_CAMERAS,
+)
+
+
+async def detect_frame(frame: Frame) -> DetectionResponse:
+    options = repr((frame.roi, frame.slicing)).encode()
+    key = frame_hash(frame.image, options)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+    signature = None
+    if frame_gate.enabled and frame.camera_id:
+        crop = roi_bounds(frame.roi) if frame.roi else None
+        # Cheap enough for a plain thread; the inference executor may be busy
+        signature = await asyncio.to_thread(frame_signature, frame.image, crop)
+        carried = frame_gate.check(frame.camera_id, options, signature)
+        if carried is not None:
+            return carried
+    response = await batcher.submit(frame)
+    result_cache.put(key, response)
+    if signature is not None:
+        frame_gate.update(frame.camera_id, options, signature, response)
+    return response
+
+
+def read_roi(raw: Optional[str]):
+    try:
+        return parse_roi(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid roi: {e}")
+
 
 @detections.post("/detect-vehicles", response_model=DetectionResponse)
-async def detect_vehicles(file: UploadFile = File(...)):
-    print(f"Model loaded on device: {torch.cuda.is_available()}")
+async def detect_vehicles(
+    file: UploadFile = File(...),
+    roi: Optional[str] = Form(None),
+    camera_id: Optional[str] = Form(None),
+    sliced: Optional[bool] = Form(None),
+):
+    """Detect vehicles in one frame.
+
+    ``roi`` is an optional JSON polygon ``[[x, y], ...]`` normalised to the
+    frame size. The frame is cropped to its bounding box before inference
+    and detections centred outside the polygon are not counted.
+
+    ``camera_id`` selects the camera's profile (sliced inference settings,
+    see camera_profiles.py); ``sliced`` turns slicing on or off for this
+    request regardless of the profile.
+    """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image.")
+    polygon = read_roi(roi)
     try:
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        results = model(image)
-        detections_list = []
-        counts = {cls: 0 for cls in vehicle_classes}
-        for box in results[0].boxes:
-            cls = int(box.cls[0])
-            label = model.names[cls]
-            if label in vehicle_classes:
-                counts[label] += 1
-                detections_list.append(Detection(
-                    label=label,
-                    confidence=float(box.conf[0]),
-                    bbox=[float(x) for x in box.xyxy[0].tolist()]
-                ))
-        return DetectionResponse(
-            detections=detections_list,
-            detect_at=datetime.utcnow().isoformat(),
-            numberOfBicycle=counts['bicycle'],
-            numberOfMotorcycle=counts['motorcycle'],
-            numberOfCar=counts['car'],
-            numberOfVan=counts['van'],
-            numberOfTruck=counts['truck'],
-            numberOfBus=counts['bus'],
-            numberOfFireTruck=counts['fire truck'],
-            numberOfContainer=counts['container']
-        )
+        # Concurrent requests are grouped into a single batched forward pass,
+        # decoding and inference both run on the inference executor
+        return await detect_frame(Frame(image_bytes, polygon, slicing_for(camera_id, sliced), camera_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@detections.post("/detect/visualize")
-async def detect_vehicles_image(file: UploadFile = File(...)):
+@detections.post("/track-vehicles", response_model=TrackingResponse)
+async def track_vehicles(
+    file: UploadFile = File(...),
+    camera_id: str = Form(...),
+    roi: Optional[str] = Form(None),
+    sliced: Optional[bool] = Form(None),
+):
+    """Detect vehicles in the next frame of a camera and track them across frames.
+
+    Frames of one camera must be sent in order. Detections are matched to
+    the camera's tracks from its previous frames; ``newVehicles`` counts
+    only the vehicles seen for the first time, which is what throughput
+    statistics should add up. ``numberOf*`` still count every vehicle
+    visible in this frame.
+    """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image.")
+    polygon = read_roi(roi)
     try:
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        results = model(image)
-        draw = ImageDraw.Draw(image)
-        for box in results[0].boxes:
-            cls = int(box.cls[0])
-            label = model.names[cls]
-            if label in vehicle_classes:
-                bbox = [float(x) for x in box.xyxy[0].tolist()]
-                draw.rectangle(bbox, outline="red", width=3)
-                draw.text((bbox[0], bbox[1] - 10), label, fill="red")
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='JPEG')
-        img_byte_arr.seek(0)
-        return StreamingResponse(img_byte_arr, media_type="image/jpeg")
+        response = await detect_frame(Frame(image_bytes, polygon, slicing_for(camera_id, sliced), camera_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-@detections.post("/detect/images")
-async def detect_vehicles_image(file: UploadFile = File(...)):
+
+    detected = response.detections
+    update = tracker.update(
+        camera_id,
+        np.array([label_index[d.label] for d in detected], dtype=np.int64),
+        np.array([d.confidence for d in detected], dtype=np.float32),
+        np.array([d.bbox for d in detected], dtype=np.float32).reshape(-1, 4),
+        num_classes=len(vehicle_classes),
+    )
+    return TrackingResponse(
+        **response.model_dump(),
+        cameraId=camera_id,
+        trackIds=update.track_ids,
+        newTrackIds=update.new_ids,
+        newVehicles=dict(zip(COUNT_FIELDS, update.new_counts.tolist())),
+        activeTracks=update.active,
+    )
+
+
+async def read_batch_frames(request: Request) -> list:
+    """Read (id, Frame) pairs from a multipart or length-prefixed body."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        files = form.getlist("files")
+        ids = form.getlist("ids")
+        rois = form.getlist("rois")
+        camera_ids = form.getlist("camera_ids")
+        if ids and len(ids) != len(files):
+            raise HTTPException(status_code=400, detail="Number of ids must match number of files.")
+        if rois and len(rois) != len(files):
+            raise HTTPException(status_code=400, detail="Number of rois must match number of files.")
+        if camera_ids and len(camera_ids) != len(files):
+            raise HTTPException(status_code=400, detail="Number of camera_ids must match number of files.")
+        frames = []
+        for i, file in enumerate(files):
+            if not isinstance(file, FormFile) or not (file.content_type or "").startswith("image/"):
+                raise HTTPException(status_code=400, detail="All files must be images.")
+            camera_id = (camera_ids[i] or None) if camera_ids else None
+            frame = Frame(await file.read(), read_roi(rois[i]) if rois else None, slicing_for(camera_id), camera_id)
+            frames.append((ids[i] if ids else (file.filename or str(i)), frame))
+        return frames
+    if content_type.startswith("application/octet-stream"):
+        try:
+            return [(frame_id, Frame(image, slicing=slicing_for(None)))
+                    for frame_id, image in unpack_frames(await request.body())]
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid frame stream: {e}")
+    raise HTTPException(status_code=415, detail="Expected multipart/form-data or application/octet-stream.")
+
+
+@detections.post("/detect-vehicles/batch", response_model=BatchDetectionResponse)
+async def detect_vehicles_batch(request: Request):
+    """Detect vehicles in many frames at once.
+
+    Accepts either multipart form data (``files`` plus optional ``ids``,
+    ``rois`` and ``camera_ids``, one per file; an empty value means none) or an
+    ``application/octet-stream`` body of length-prefixed frames (see
+    ``payloads.py``). Results are keyed by the caller's ids.
+    """
+    frames = await read_batch_frames(request)
+    if not frames:
+        raise HTTPException(status_code=400, detail="No frames in request.")
+    if len(frames) > BATCH_REQUEST_MAX_FRAMES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_REQUEST_MAX_FRAMES} frames per request.")
+    ids = [frame_id for frame_id, _ in frames]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Frame ids must be unique.")
+
+    # Submitted together, the frames land in the same batched forward passes
+    outcomes = await asyncio.gather(
+        *[detect_frame(frame) for _, frame in frames], return_exceptions=True
+    )
+    results, errors = {}, {}
+    for frame_id, outcome in zip(ids, outcomes):
+        if isinstance(outcome, Exception):
+            errors[frame_id] = str(outcome)
+        else:
+            results[frame_id] = outcome
+    return BatchDetectionResponse(results=results, errors=errors)
+
+
+@detections.websocket("/ws/detect")
+async def detect_stream(websocket: WebSocket, boxes: bool = True):
+    """Continuous detection over one WebSocket connection.
+
+    Send binary messages ``[u16 camera id length][camera id, utf-8][JPEG]``.
+    The first text message lists ``classes``; every result after that is
+    ``{"c": camera id, "s": frame number of that camera, "d": frames dropped
+    since its last result, "t": detect_at, "n": counts, "b": boxes}``.
+    When frames arrive faster than they are detected only the newest
+    waiting frame of each camera is kept. ``boxes=false`` leaves out ``b``.
+    """
+    await serve_stream(websocket, detect_frame, max_in_flight=STREAM_MAX_IN_FLIGHT, boxes=boxes)
+
+
+@detections.get("/live")
+async def live():
+    return {"status": "alive"}
+
+
+@detections.get("/ready")
+async def ready():
+    """200 once the models are loaded and warmed up, 503 before that."""
+    return JSONResponse(status_code=200 if state.ready else 503, content=state.snapshot())
+
+
+@detections.get("/metrics")
+async def get_metrics():
+    return {
+        "batcher": batcher.stats(),
+        "executor": executor.stats(),
+        "result_cache": result_cache.stats(),
+        "annotated_cache": annotated_cache.stats(),
+        "gate": frame_gate.stats(),
+        "tracker": tracker.stats(),
+        "stream": stream_stats.stats(),
+    }
+
+
+def render_options(
+    quality: int = Query(JPEG_QUALITY, ge=1, le=100),
+    max_size: Optional[int] = Query(None, ge=16),
+) -> RenderOptions:
+    """JPEG ``quality`` and ``max_size`` (longest side, for thumbnails) of annotated frames."""
+    return RenderOptions(quality=quality, max_size=max_size)
+
+
+async def annotated_frame(
+    file: UploadFile, camera_id: Optional[str], options: RenderOptions
+) -> Tuple[DetectionResponse, bytes]:
+    """Detections of an uploaded frame and the frame with them drawn, JPEG encoded.
+
+    Detection goes through the batcher and result cache like
+    /detect-vehicles; only the drawing and encoding happen here.
+    """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image.")
     try:
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        results = model(image)
-        draw = ImageDraw.Draw(image)
-        for box in results[0].boxes:
-            cls = int(box.cls[0])
-            label = model.names[cls]
-            if label in vehicle_classes:
-                bbox = [float(x) for x in box.xyxy[0].tolist()]
-                draw.rectangle(bbox, outline="red", width=3)
-                draw.text((bbox[0], bbox[1] - 10), label, fill="red")
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='JPEG')
-        img_byte_arr.seek(0)
-        # Return as list of ints
-        return list(img_byte_arr.read())
+        key = frame_hash(image_bytes, repr((camera_id, options)).encode())
+        cached = annotated_cache.get(key)
+        if cached is not None:
+            return cached
+        detection = await detect_frame(Frame(image_bytes, slicing=slicing_for(camera_id)))
+        annotated = await executor.run(render_detections, image_bytes, detection, options)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    annotated_cache.put(key, (detection, annotated))
+    return detection, annotated
+
+
+@detections.post("/detect/visualize")
+async def detect_vehicles_visualize(
+    file: UploadFile = File(...),
+    camera_id: Optional[str] = Form(None),
+    options: RenderOptions = Depends(render_options),
+):
+    _, annotated = await annotated_frame(file, camera_id, options)
+    return Response(content=annotated, media_type="image/jpeg")
+
+
+@detections.post("/detect/images")
+async def detect_vehicles_image(
+    file: UploadFile = File(...),
+    camera_id: Optional[str] = Form(None),
+    encoding: Literal["jpeg", "base64", "ints"] = "jpeg",
+    options: RenderOptions = Depends(render_options),
+):
+    """Annotated image as a raw JPEG body, or base64 in a JSON envelope.
+
+    ``encoding=ints`` keeps the old JSON list-of-ints payload for clients
+    that have not migrated yet; it is about 4x larger than the JPEG.
+    """
+    _, annotated = await annotated_frame(file, camera_id, options)
+    if encoding == "base64":
+        return EncodedImage(image=base64.b64encode(annotated).decode("ascii"))
+    if encoding == "ints":
+        return list(annotated)
+    return Response(content=annotated, media_type="image/jpeg")
+
+
+@detections.post("/detect/annotated")
+async def detect_vehicles_annotated(
+    file: UploadFile = File(...),
+    camera_id: Optional[str] = Form(None),
+    format: Literal["multipart", "json"] = "multipart",
+    options: RenderOptions = Depends(render_options),
+):
+    """Detection results and the annotated image from a single inference.
+
+    By default the response is ``multipart/mixed`` with a ``detection``
+    (application/json) part and an ``annotated`` (image/jpeg) part;
+    ``format=json`` returns an AnnotatedDetectionResponse with the image base64
+    encoded instead.
+    """
+    detection, annotated = await annotated_frame(file, camera_id, options)
+    if format == "json":
+        return AnnotatedDetectionResponse(
+            detection=detection,
+            annotated=EncodedImage(image=base64.b64encode(annotated).decode("ascii")),
+        )
+    body, content_type = build_multipart([
+        ("detection", "application/json", detection.model_dump_json().encode("utf-8")),
+        ("annotated", "image/jpeg", annotated),
+    ])
+    return Response(content=body, media_type=content_type)
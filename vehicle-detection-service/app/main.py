@@ -1,6 +1,9 @@
 from fastapi import FastAPI
-from app.api.vehicle_detection import detections
+from app.api.vehicle_detection import detections, batcher, executor
+from app.api.backends import prepare_model
+from app.api.lifecycle import load_models, warm_up
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 app = FastAPI(openapi_url="/api/v1/vehicle_detection/openapi.json", docs_url="/docs")
 
 app.add_middleware(
@@ -15,9 +18,22 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup():
     print("starting up")
+    # Export/cache the configured backend once, before the workers load it
+    executor.start(prepare_model())
+    await batcher.start()
+    await load_models(executor)
+    # Warm-up runs in the background so /live answers right away;
+    # /ready flips to 200 once it is done
+    app.state.warmup_task = asyncio.create_task(warm_up(executor))
 
 @app.on_event("shutdown")
 async def shutdown():
     print("shutdown")
+    # Not set if startup failed before warm-up began
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task:
+        warmup_task.cancel()
+    await batcher.stop()
+    executor.shutdown()
 
 app.include_router(detections, tags=['detections'])
\ No newline at end of file
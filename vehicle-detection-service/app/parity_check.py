@@ -0,0 +1,79 @@
+"""Compare vehicle counts of an exported model backend against the PyTorch model.
+
+Runs both models over the bundled sample frames (``SAMPLES_DIR`` plus the
+images shipped with ultralytics) and reports per-image count differences and
+per-frame latency.
+
+Usage:
+    python -m app.parity_check --backend onnx [--int8] [--tolerance 0.05] [--min-vehicles 200]
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+from PIL import Image
+from ultralytics import YOLO
+
+from app.api.backends import BACKENDS, prepare_model
+from app.api.config import MODEL_PATH
+from app.api.detector import vehicle_classes
+from app.samples import sample_images
+
+
+def count_vehicles(model: YOLO, image: Image.Image) -> Dict[str, int]:
+    counts = {cls: 0 for cls in vehicle_classes}
+    for cls in model(image, verbose=False)[0].boxes.cls.tolist():
+        label = model.names[int(cls)]
+        if label in counts:
+            counts[label] += 1
+    return counts
+
+
+def run(model: YOLO, images: List[Image.Image]) -> tuple:
+    count_vehicles(model, images[0])  # warm-up
+    started = time.perf_counter()
+    counts = [count_vehicles(model, image) for image in images]
+    return counts, (time.perf_counter() - started) * 1000 / len(images)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=MODEL_PATH)
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], required=True)
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Maximum allowed total count difference, relative to the PyTorch counts")
+    parser.add_argument("--min-vehicles", type=int, default=200,
+                        help="Fail when the PyTorch model counts fewer vehicles than this over all frames")
+    args = parser.parse_args()
+
+    paths = sample_images()
+    if not paths:
+        sys.exit("No sample images found")
+    images = [Image.open(p).convert("RGB") for p in paths]
+
+    reference, reference_ms = run(YOLO(args.weights, task='detect'), images)
+    candidate_path = prepare_model(args.weights, args.backend, args.int8)
+    candidate, candidate_ms = run(YOLO(candidate_path, task='detect'), images)
+
+    total_ref = total_diff = 0
+    for path, ref, cand in zip(paths, reference, candidate):
+        diff = {cls: cand[cls] - ref[cls] for cls in vehicle_classes if cand[cls] != ref[cls]}
+        total_ref += sum(ref.values())
+        total_diff += sum(abs(d) for d in diff.values())
+        print(f"{path.name}: {'OK' if not diff else diff}")
+
+    mismatch = total_diff / max(1, total_ref)
+    print(f"torch: {reference_ms:.1f} ms/frame, {args.backend}{' int8' if args.int8 else ''}: {candidate_ms:.1f} ms/frame")
+    print(f"count mismatch: {total_diff}/{total_ref} ({mismatch:.1%}), tolerance {args.tolerance:.1%}")
+    # A few vehicles say nothing about the tolerance, e.g. only the ultralytics
+    # images when no camera frames were recorded into SAMPLES_DIR
+    if total_ref < args.min_vehicles:
+        sys.exit(f"Only {total_ref} vehicles in {len(paths)} sample frames, need at least {args.min_vehicles}; "
+                 f"record more camera frames into samples/")
+    sys.exit(0 if mismatch <= args.tolerance else 1)
+
+
+if __name__ == "__main__":
+    main()
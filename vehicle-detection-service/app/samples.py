@@ -0,0 +1,17 @@
+from pathlib import Path
+from typing import List
+
+from ultralytics.utils import ASSETS
+
+from app.api.config import SAMPLES_DIR
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def sample_images(samples_dir: str = SAMPLES_DIR) -> List[Path]:
+    """Recorded frames in ``samples_dir`` plus the images bundled with ultralytics."""
+    paths = []
+    for folder in (Path(samples_dir), Path(ASSETS)):
+        if folder.is_dir():
+            paths.extend(sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES))
+    return paths
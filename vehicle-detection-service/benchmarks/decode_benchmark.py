@@ -0,0 +1,57 @@
+"""Decode + preprocess time per frame: full-resolution path vs fast decode.
+
+The baseline is what the service used to do: decode the full frame with
+PIL, convert to RGB and let ultralytics letterbox it to the model size.
+The fast path decodes JPEGs at reduced resolution (DCT scaling) straight
+into a preallocated letterboxed buffer.
+
+Usage (from vehicle-detection-service/):
+    python -m benchmarks.decode_benchmark [--repeat 50]
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image
+from ultralytics.data.augment import LetterBox
+
+from app.api.config import MODEL_IMGSZ
+from app.api.preprocess import decode_letterboxed, input_buffers
+from app.samples import sample_images
+
+
+def baseline(image_bytes: bytes, letterbox: LetterBox) -> np.ndarray:
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    return letterbox(image=np.asarray(image)[..., ::-1])
+
+
+def fast(image_bytes: bytes, slot: np.ndarray) -> np.ndarray:
+    return decode_letterboxed(image_bytes, slot)[0]
+
+
+def time_per_frame(fn, frames: list, arg, repeat: int) -> float:
+    fn(frames[0], arg)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            fn(frame, arg)
+    return (time.perf_counter() - started) * 1000 / (repeat * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    frames = [p.read_bytes() for p in sample_images()]
+    for frame in frames:
+        print(f"frame {Image.open(io.BytesIO(frame)).size}")
+    baseline_ms = time_per_frame(baseline, frames, LetterBox((MODEL_IMGSZ, MODEL_IMGSZ), auto=True), args.repeat)
+    fast_ms = time_per_frame(fast, frames, input_buffers(1)[0], args.repeat)
+    print(f"baseline (full decode + letterbox): {baseline_ms:.2f} ms/frame")
+    print(f"fast decode (draft + preallocated): {fast_ms:.2f} ms/frame ({baseline_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
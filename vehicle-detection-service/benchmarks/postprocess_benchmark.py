@@ -0,0 +1,81 @@
+"""Per-request post-processing cost on crowded frames.
+
+Compares the original per-box Python loop (one ``int(box.cls[0])``, name
+lookup and list membership test per box) with the vectorised
+``build_detection_response`` on synthetic results with many boxes.
+
+Usage (from vehicle-detection-service/):
+    python -m benchmarks.postprocess_benchmark [--boxes 250] [--repeat 200]
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from app.api.detector import build_detection_response, vehicle_classes
+from app.api.models import Detection
+
+# COCO class ids of the vehicle classes the model knows about
+COCO_VEHICLES = {1: 'bicycle', 2: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck'}
+NAMES = {i: COCO_VEHICLES.get(i, f"class_{i}") for i in range(80)}
+
+
+def legacy_build_response(result) -> dict:
+    detections_list = []
+    counts = {cls: 0 for cls in vehicle_classes}
+    for box in result.boxes:
+        cls = int(box.cls[0])
+        label = result.names[cls]
+        if label in vehicle_classes:
+            counts[label] += 1
+            detections_list.append(Detection(
+                label=label,
+                confidence=float(box.conf[0]),
+                bbox=[float(x) for x in box.xyxy[0].tolist()]
+            ))
+    return counts
+
+
+def crowded_result(n_boxes: int, vehicle_share: float, rng: np.random.Generator) -> Results:
+    xy = rng.uniform(0, 1200, size=(n_boxes, 2))
+    wh = rng.uniform(10, 80, size=(n_boxes, 2))
+    conf = rng.uniform(0.25, 1.0, size=(n_boxes, 1))
+    vehicle = rng.random(n_boxes) < vehicle_share
+    cls = np.where(vehicle, rng.choice(list(COCO_VEHICLES), n_boxes), rng.choice([0, 9, 11, 13], n_boxes))
+    data = np.hstack([xy, xy + wh, conf, cls[:, None]]).astype(np.float32)
+    return Results(np.zeros((720, 1280, 3), np.uint8), path="", names=NAMES, boxes=torch.from_numpy(data))
+
+
+def time_per_call(fn, result: Results, repeat: int) -> float:
+    fn(result)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(result)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Before: NMS keeps every class, the loop filters. After: the model is called
+    # with classes=, so only vehicle boxes reach post-processing.
+    unfiltered = crowded_result(args.boxes, vehicle_share=0.7, rng=rng)
+    filtered = crowded_result(args.boxes, vehicle_share=1.0, rng=rng)
+
+    legacy_ms = time_per_call(legacy_build_response, unfiltered, args.repeat)
+    vector_unfiltered_ms = time_per_call(build_detection_response, unfiltered, args.repeat)
+    vector_ms = time_per_call(build_detection_response, filtered, args.repeat)
+    print(f"{args.boxes} boxes per frame")
+    print(f"per-box loop:                 {legacy_ms:.3f} ms/frame")
+    print(f"vectorised (mixed classes):   {vector_unfiltered_ms:.3f} ms/frame ({legacy_ms / vector_unfiltered_ms:.1f}x)")
+    print(f"vectorised (classes= in NMS): {vector_ms:.3f} ms/frame ({legacy_ms / vector_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
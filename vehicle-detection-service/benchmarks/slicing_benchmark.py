@@ -0,0 +1,75 @@
+"""Latency and vehicle counts with sliced inference off vs a few tile settings.
+
+Each sample frame is run through ``detect_batch`` once per configuration.
+If ``samples/counts.json`` holds hand-counted vehicles per frame (see
+samples/README.md), the mean absolute count error of every configuration
+is reported as well.
+
+Usage (from vehicle-detection-service/):
+    python -m benchmarks.slicing_benchmark [--repeat 5] [--tiles 640:0.2,512:0.25]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from app.api.config import SAMPLES_DIR
+from app.api.detector import COUNT_FIELDS, Frame, detect_batch, vehicle_classes
+from app.api.slicing import SliceConfig
+from app.samples import sample_images
+
+
+def parse_tiles(raw: str) -> list:
+    configs = []
+    for entry in raw.split(","):
+        tile_size, overlap = entry.split(":")
+        configs.append(SliceConfig(tile_size=int(tile_size), overlap=float(overlap)))
+    return configs
+
+
+def counts_of(response) -> dict:
+    return {label: getattr(response, field) for label, field in zip(vehicle_classes, COUNT_FIELDS)}
+
+
+def run(frames: list, slicing, repeat: int) -> tuple:
+    detect_batch([Frame(frames[0], slicing=slicing)])  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        responses = [detect_batch([Frame(frame, slicing=slicing)])[0] for frame in frames]
+    latency_ms = (time.perf_counter() - started) * 1000 / (repeat * len(frames))
+    return latency_ms, [counts_of(r) for r in responses]
+
+
+def count_error(counts: list, names: list, truth: dict):
+    errors = [
+        sum(abs(c.get(label, 0) - truth[name].get(label, 0)) for label in vehicle_classes)
+        for c, name in zip(counts, names) if name in truth
+    ]
+    return sum(errors) / len(errors) if errors else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tiles", default="640:0.2,512:0.25", help="tile_size:overlap pairs")
+    args = parser.parse_args()
+
+    paths = sample_images()
+    frames = [p.read_bytes() for p in paths]
+    names = [p.name for p in paths]
+    truth_path = Path(SAMPLES_DIR) / "counts.json"
+    truth = json.loads(truth_path.read_text()) if truth_path.exists() else {}
+
+    for slicing in [None] + parse_tiles(args.tiles):
+        latency_ms, counts = run(frames, slicing, args.repeat)
+        label = "off" if slicing is None else f"tile={slicing.tile_size} overlap={slicing.overlap}"
+        totals = {k: sum(c[k] for c in counts) for k in vehicle_classes}
+        line = f"{label:<28} {latency_ms:8.1f} ms/frame  counts {json.dumps({k: v for k, v in totals.items() if v})}"
+        error = count_error(counts, names, truth)
+        if error is not None:
+            line += f"  mean abs count error {error:.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
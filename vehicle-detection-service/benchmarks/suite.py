@@ -0,0 +1,200 @@
+"""Throughput and latency of every stage of the detector, as JSON.
+
+Stages:
+    decode        full-resolution PIL decode to RGB
+    preprocess    reduced-resolution decode + letterbox into a preallocated slot
+    forward_bs{N} model forward pass on preprocessed inputs, N frames per call
+    e2e           POST /detect-vehicles through the ASGI app (httpx in-process
+                  transport), batcher and executor included
+
+Frames are the recorded samples (samples/ plus the ultralytics assets) and/or
+synthetic noise frames at typical camera sizes. Each stage reports frames/s,
+mean/p50/p95/p99 latency per call and the peak RSS of the process so far.
+Write the results to a file per commit and compare two runs with --baseline.
+
+Usage (from vehicle-detection-service/):
+    python -m benchmarks.suite [--frames recorded|synthetic|both] [--repeat 5]
+        [--batch-sizes 1,4,16] [--concurrency 16] [--output results.json]
+        [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Repeated frames would otherwise be answered from the result cache
+os.environ.setdefault("RESULT_CACHE_CAPACITY", "0")
+
+import numpy as np
+
+from app.api.config import MODEL_BACKEND, MODEL_PATH
+from app.api.detector import decode_image, get_model, vehicle_class_ids, warmup_frame
+from app.api.preprocess import decode_letterboxed, input_buffers
+from app.samples import sample_images
+
+SYNTHETIC_SIZES = [(1280, 720), (1920, 1080)]
+COMPARED_METRICS = ["fps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"]
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows: psutil only has the current working set
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def summarise(latencies_s: List[float], wall_s: float, frames: int) -> Dict:
+    ms = np.asarray(latencies_s) * 1000
+    return {
+        "calls": len(ms),
+        "frames": frames,
+        "fps": frames / wall_s,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(fn: Callable, items: list, repeat: int, frames_per_call: int = 1) -> Dict:
+    """Time ``fn(item)`` for every item, ``repeat`` times, after one warm-up call."""
+    fn(items[0])
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            call_started = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - call_started)
+    return summarise(latencies, time.perf_counter() - started, len(latencies) * frames_per_call)
+
+
+def load_frames(kind: str) -> List[bytes]:
+    frames = []
+    if kind in ("recorded", "both"):
+        frames += [p.read_bytes() for p in sample_images()]
+    if kind in ("synthetic", "both"):
+        frames += [warmup_frame(width, height) for width, height in SYNTHETIC_SIZES]
+    return frames
+
+
+def bench_forward(frames: List[bytes], batch_size: int, repeat: int) -> Dict:
+    model = get_model()
+    classes = vehicle_class_ids(model.names)
+    # Batches of one frame repeated, like the same-shape groups detect_batch builds
+    inputs = [decode_letterboxed(frame, input_buffers(1)[0])[0].copy() for frame in frames]
+    batches = [[image] * batch_size for image in inputs]
+    return measure(lambda batch: model(batch, classes=classes, verbose=False), batches, repeat, batch_size)
+
+
+async def bench_e2e(frames: List[bytes], repeat: int, concurrency: int) -> Dict:
+    import httpx
+
+    from app.main import app, shutdown, startup
+
+    await startup()
+    await app.state.warmup_task
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            async def request(frame: bytes):
+                async with slots:
+                    started = time.perf_counter()
+                    response = await client.post("/detect-vehicles", files={"file": ("frame.jpg", frame, "image/jpeg")})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*[request(frame) for _ in range(repeat) for frame in frames])
+            wall_s = time.perf_counter() - started
+    finally:
+        await shutdown()
+    result = summarise(latencies, wall_s, len(latencies))
+    result["concurrency"] = concurrency
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict):
+    """Print the relative change of every stage metric against an earlier run."""
+    print(f"compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})", file=sys.stderr)
+    for stage, metrics in results["results"].items():
+        previous = baseline["results"].get(stage)
+        if previous is None:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            if previous.get(metric):
+                changes.append(f"{metric} {(metrics[metric] - previous[metric]) / previous[metric]:+.1%}")
+        print(f"  {stage:<14} {'  '.join(changes)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", choices=["recorded", "synthetic", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-sizes", default="1,4,16")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stages", default="decode,preprocess,forward,e2e")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    stages = args.stages.split(",")
+    results = {}
+    if "decode" in stages:
+        results["decode"] = measure(decode_image, frames, args.repeat)
+    if "preprocess" in stages:
+        slot = input_buffers(1)[0]
+        results["preprocess"] = measure(lambda frame: decode_letterboxed(frame, slot), frames, args.repeat)
+    if "forward" in stages:
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            results[f"forward_bs{batch_size}"] = bench_forward(frames, batch_size, args.repeat)
+    if "e2e" in stages:
+        results["e2e"] = asyncio.run(bench_e2e(frames, args.repeat, args.concurrency))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "model": MODEL_PATH,
+            "backend": MODEL_BACKEND,
+            "frames": len(frames),
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()